@@ -9,6 +9,7 @@ from tools import (
     get_current_location, 
     search_agricultural_info,
     predict_plant_disease,
+    find_similar_plant_cases,
     predict_crop_yield,
     analyze_crop_health_with_ai,
     generate_farming_plan,
@@ -33,6 +34,7 @@ root_agent = LlmAgent(
         get_current_location,
         search_agricultural_info,
         predict_plant_disease,
+        find_similar_plant_cases,
         predict_crop_yield,
         analyze_crop_health_with_ai,
         generate_farming_plan,
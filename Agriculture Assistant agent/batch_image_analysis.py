@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Batch plant image analysis for a whole field visit
+
+Images are analyzed by PlantImageAnalyzer in a process pool (one process per
+core), results are streamed to a JSONL file as each image finishes, and a
+per-image summary table is written alongside, e.g.:
+
+    python batch_image_analysis.py "uploads/field_12" -o field_12.jsonl
+    python batch_image_analysis.py "uploads/*/IMG_*.jpg" --summary field_12.csv
+    python batch_image_analysis.py manifest.csv --with-ai
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+from bulk_predict import list_image_paths
+
+BATCH_ANALYSIS_WORKERS = int(os.getenv("BATCH_ANALYSIS_WORKERS", "0"))  # 0 = one per core
+COLOR_CONDITIONS = ['brown_spots', 'yellow_areas', 'white_powdery', 'black_spots', 'healthy_green']
+SUMMARY_FIELDS = (['image_path', 'overall_health', 'severity_level'] + [f"{c}_pct" for c in COLOR_CONDITIONS]
+                  + ['spot_count', 'texture_roughness', 'seconds', 'error'])
+
+
+def _init_worker(io_stage_workers):
+    """Keep each process on one core: the pool already supplies the parallelism"""
+    # Read by stage_runner when image_analysis_service is first imported below
+    os.environ["ANALYSIS_STAGE_WORKERS"] = "1"
+    os.environ["ANALYSIS_IO_STAGE_WORKERS"] = str(io_stage_workers)
+    import cv2
+    cv2.setNumThreads(1)
+
+
+def _analyze_one(image_path, max_dimension, include_ai):
+    from image_analysis_service import plant_analyzer
+    start = time.perf_counter()
+    try:
+        result = plant_analyzer.analyze_plant_image(image_path, max_dimension, include_ai=include_ai)
+    except Exception as e:
+        result = {"error": f"Image analysis failed: {str(e)}"}
+    return image_path, result, time.perf_counter() - start
+
+
+def iter_plant_image_analyses(paths, workers=None, include_ai=False, max_dimension=None):
+    """Analyze images across a process pool, yielding (path, result, seconds) as each one completes
+
+    At most a few images per worker are in flight, so memory stays bounded
+    however many paths are given.
+    """
+    paths = list(paths)
+    if not paths:
+        return
+    workers = min(workers or BATCH_ANALYSIS_WORKERS or os.cpu_count() or 1, len(paths))
+    # The AI stage mostly waits on the network; a spare thread lets a hung call time out without blocking the next
+    io_stage_workers = 2 if include_ai else 1
+
+    # spawn: forked children would inherit the parent's stage thread pool without its threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(io_stage_workers,)) as executor:
+        remaining = iter(paths)
+        pending = set()
+        for path in remaining:
+            pending.add(executor.submit(_analyze_one, path, max_dimension, include_ai))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                next_path = next(remaining, None)
+                if next_path is not None:
+                    pending.add(executor.submit(_analyze_one, next_path, max_dimension, include_ai))
+
+
+def summary_row(image_path, result, seconds):
+    """Flatten one analysis result into a SUMMARY_FIELDS row"""
+    row = {"image_path": image_path, "seconds": round(seconds, 3), "error": result.get("error")}
+    if row["error"]:
+        return row
+
+    assessment = result.get("comprehensive_assessment", {})
+    color = result.get("color_analysis", {})
+    texture = result.get("texture_analysis", {})
+    row["overall_health"] = assessment.get("overall_health")
+    row["severity_level"] = assessment.get("severity_level")
+    for condition in COLOR_CONDITIONS:
+        row[f"{condition}_pct"] = round(color.get(condition, {}).get("percentage", 0.0), 2)
+    row["spot_count"] = texture.get("spot_count")
+    row["texture_roughness"] = round(texture.get("texture_roughness", 0.0), 2)
+    return row
+
+
+def analyze_plant_images_batch(source, output_path="image_analysis.jsonl", summary_path=None, workers=None,
+                               include_ai=False, max_dimension=None, progress_every=25):
+    """Analyze every image in ``source`` and stream full results to ``output_path`` (JSONL)
+
+    ``source`` is a directory, glob, CSV manifest or list of paths. The
+    per-image summary table goes to ``summary_path`` (CSV, default next to
+    the output). Returns counts, timings and the summary rows sorted by path.
+    """
+    paths = list_image_paths(source) if isinstance(source, str) else list(source)
+    summary_path = summary_path or f"{os.path.splitext(output_path)[0]}.summary.csv"
+    rows = []
+    start_time = time.perf_counter()
+
+    with open(output_path, 'w') as output:
+        for image_path, result, seconds in iter_plant_image_analyses(paths, workers, include_ai, max_dimension):
+            output.write(json.dumps({"image_path": image_path, "seconds": round(seconds, 3), **result}) + "\n")
+            output.flush()
+            rows.append(summary_row(image_path, result, seconds))
+            if progress_every and len(rows) % progress_every == 0:
+                elapsed = time.perf_counter() - start_time
+                print(f"   {len(rows)}/{len(paths)} images ({len(rows) / elapsed:.1f} images/sec)", flush=True)
+
+    rows.sort(key=lambda row: row["image_path"])
+    with open(summary_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    elapsed = time.perf_counter() - start_time
+    failed = sum(1 for row in rows if row["error"])
+    return {
+        "total_images": len(paths),
+        "analyzed": len(rows) - failed,
+        "failed": failed,
+        "elapsed_seconds": elapsed,
+        "images_per_second": len(rows) / elapsed if elapsed > 0 else 0.0,
+        "output_path": output_path,
+        "summary_path": summary_path,
+        "rows": rows
+    }
+
+
+def print_summary_table(rows):
+    print(f"\n{'image':<32}{'health':>9}{'severity':>10}{'brown %':>9}{'yellow %':>10}{'green %':>9}{'spots':>7}")
+    for row in rows:
+        name = os.path.basename(row["image_path"])[-32:]
+        if row["error"]:
+            print(f"{name:<32}  ❌ {row['error']}")
+            continue
+        print(f"{name:<32}{row['overall_health']:>9}{row['severity_level']:>10}{row['brown_spots_pct']:>9.1f}"
+              f"{row['yellow_areas_pct']:>10.1f}{row['healthy_green_pct']:>9.1f}{row['spot_count']:>7}")
+
+    health_counts = {}
+    for row in rows:
+        if not row["error"]:
+            health_counts[row["overall_health"]] = health_counts.get(row["overall_health"], 0) + 1
+    print("\n" + ", ".join(f"{health}: {count}" for health, count in sorted(health_counts.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch plant image analysis")
+    parser.add_argument("source", help="Image directory, glob pattern or CSV manifest")
+    parser.add_argument("-o", "--output", default="image_analysis.jsonl", help="Full per-image results (JSONL)")
+    parser.add_argument("--summary", default=None, help="Summary table (CSV, default: <output>.summary.csv)")
+    parser.add_argument("--workers", type=int, default=None, help="Analysis processes (default: one per core)")
+    parser.add_argument("--max-dimension", type=int, default=None,
+                        help="Longest image side used for analysis (0 = full resolution)")
+    parser.add_argument("--with-ai", action="store_true", help="Also request Groq AI observations per image")
+    parser.add_argument("--progress-every", type=int, default=25)
+    args = parser.parse_args()
+
+    print(f"🔬 Batch plant image analysis: {args.source}")
+    summary = analyze_plant_images_batch(
+        args.source,
+        args.output,
+        summary_path=args.summary,
+        workers=args.workers,
+        include_ai=args.with_ai,
+        max_dimension=args.max_dimension,
+        progress_every=args.progress_every
+    )
+    print_summary_table(summary["rows"])
+    print(f"✅ {summary['analyzed']} analyzed, {summary['failed']} failed "
+          f"in {summary['elapsed_seconds']:.1f}s ({summary['images_per_second']:.1f} images/sec)")
+    print(f"💾 Results: {summary['output_path']}, summary: {summary['summary_path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the analysis resolution of PlantImageAnalyzer
+For each ANALYSIS_MAX_DIMENSION setting: decode + CV analysis latency, peak
+memory, and how far the reported metrics drift from full resolution
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+import tracemalloc
+import cv2
+sys.path.append('.')
+
+from image_analysis_service import plant_analyzer
+from benchmark_dominant_colors import synthetic_leaf
+
+DEFAULT_DIMENSIONS = [0, 3000, 2048, 1024, 768, 512]
+
+
+def analyze_cv_only(image_path, max_dimension):
+    """The OpenCV part of analyze_plant_image (no Groq call), run sequentially"""
+    image, original_size, scale = plant_analyzer._load_analysis_image(image_path, max_dimension)
+    features = plant_analyzer._pixel_features(image)
+    return {
+        "basic": plant_analyzer._basic_image_analysis(image, features, original_size),
+        "color": plant_analyzer._analyze_colors(image, features),
+        "texture": plant_analyzer._analyze_texture(image, features["gray"], area_scale=scale ** 2)
+    }
+
+
+def summarize(result):
+    texture = result["texture"]
+    return {
+        "brightness": result["basic"]["brightness_level"],
+        "brown_spots_pct": result["color"]["brown_spots"]["percentage"],
+        "healthy_green_pct": result["color"]["healthy_green"]["percentage"],
+        "edge_density": texture["edge_density"],
+        "spot_count": texture["spot_count"],
+        "largest_spot_area": max((s["area"] for s in texture["spot_details"]), default=0.0),
+        "roughness": texture["texture_roughness"]
+    }
+
+
+def measure(image_path, max_dimension, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = analyze_cv_only(image_path, max_dimension)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    analyze_cv_only(image_path, max_dimension)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(result), best * 1000, peak / (1024 * 1024)
+
+
+def run_benchmark(image_path, dimensions, repeats=3):
+    print("📐 Analysis Resolution Benchmark")
+    print("=" * 60)
+    print(f"Image: {image_path}")
+
+    reference, full_ms, full_mb = measure(image_path, 0, 1)
+    keys = list(reference)
+    print(f"\n{'max dim':>8}{'ms':>8}{'peak MB':>9}  " + "  ".join(f"{k:>18}" for k in keys))
+
+    for max_dimension in dimensions:
+        if max_dimension == 0:
+            metrics, ms, mb = reference, full_ms, full_mb
+        else:
+            metrics, ms, mb = measure(image_path, max_dimension, repeats)
+        label = "full" if max_dimension == 0 else str(max_dimension)
+        cells = []
+        for key in keys:
+            drift = metrics[key] - reference[key]
+            cells.append(f"{metrics[key]:>10.3f} ({drift:+.2f})" if max_dimension else f"{metrics[key]:>18.3f}")
+        print(f"{label:>8}{ms:>8.0f}{mb:>9.1f}  " + "  ".join(f"{c:>18}" for c in cells))
+
+    print("\nValues in parentheses: drift from full resolution (areas are in original-image pixels)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark analysis resolution")
+    parser.add_argument("image", nargs="?", help="Image file (default: synthetic 12 MP leaf photo)")
+    parser.add_argument("--dimensions", type=int, nargs="+", default=DEFAULT_DIMENSIONS,
+                        help="Max analysis dimensions to compare (0 = full resolution)")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    image_path = args.image
+    if image_path is None:
+        image_path = os.path.join(tempfile.gettempdir(), "synthetic_leaf_12mp.jpg")
+        cv2.imwrite(image_path, synthetic_leaf(3000, 4000), [cv2.IMWRITE_JPEG_QUALITY, 92])
+
+    run_benchmark(image_path, args.dimensions, args.repeats)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark for dominant-color extraction in PlantImageAnalyzer
+Compares the sampled KMeans against the old full-resolution KMeans:
+per-image cost versus image size, and how closely the results agree
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+import cv2
+sys.path.append('.')
+
+from image_analysis_service import plant_analyzer
+
+DEFAULT_SIZES = [(480, 640), (1200, 1600), (2448, 3264), (3000, 4000)]
+
+
+def synthetic_leaf(height, width, seed=0):
+    """Green leaf-like image with brown, yellow, dark and powdery spots plus sensor noise"""
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), (40, 140, 60), np.uint8)
+    spot_colors = [(30, 70, 120), (40, 200, 220), (20, 20, 20), (230, 230, 230)]
+    for _ in range(60):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        radius = int(rng.integers(height // 60 + 1, height // 15 + 2))
+        cv2.circle(image, center, radius, spot_colors[rng.integers(0, len(spot_colors))], -1)
+    noise = rng.normal(0, 12, image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+
+def full_resolution_dominant_colors(image):
+    """The previous implementation: KMeans over every pixel"""
+    from sklearn.cluster import KMeans
+    pixels = image.reshape(-1, 3)
+    kmeans = KMeans(n_clusters=5, random_state=42, n_init=10)
+    kmeans.fit(pixels)
+    colors = kmeans.cluster_centers_.astype(int)
+    percentages = np.bincount(kmeans.labels_, minlength=len(colors)) / len(kmeans.labels_) * 100
+    return [{"color_bgr": c.tolist(), "percentage": float(p)} for c, p in zip(colors, percentages)]
+
+
+def agreement(reference, candidate):
+    """Match clusters one-to-one by color; returns (max color distance, max percentage gap)"""
+    from scipy.optimize import linear_sum_assignment
+    ref_colors = np.array([c["color_bgr"] for c in reference], dtype=float)
+    cand_colors = np.array([c["color_bgr"] for c in candidate], dtype=float)
+    distances = np.linalg.norm(ref_colors[:, None] - cand_colors[None], axis=2)
+    rows, cols = linear_sum_assignment(distances)
+    pct_gap = max(abs(reference[r]["percentage"] - candidate[c]["percentage"]) for r, c in zip(rows, cols))
+    return float(distances[rows, cols].max()), float(pct_gap)
+
+
+def timed(fn, image, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(image)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def run_benchmark(images, max_reference_megapixels=4.0, repeats=3):
+    print("🎨 Dominant Color Extraction Benchmark")
+    print("=" * 60)
+    print(f"{'image':<24}{'MP':>6}{'sampled ms':>12}{'full ms':>10}{'Δcolor':>9}{'Δ%':>7}")
+
+    for name, image in images:
+        megapixels = image.shape[0] * image.shape[1] / 1e6
+        sampled, sampled_ms = timed(plant_analyzer._get_dominant_colors, image, repeats)
+
+        if megapixels <= max_reference_megapixels:
+            full, full_ms = timed(full_resolution_dominant_colors, image, 1)
+            color_gap, pct_gap = agreement(full, sampled)
+            print(f"{name:<24}{megapixels:>6.1f}{sampled_ms:>12.0f}{full_ms:>10.0f}{color_gap:>9.1f}{pct_gap:>7.2f}")
+        else:
+            print(f"{name:<24}{megapixels:>6.1f}{sampled_ms:>12.0f}{'skipped':>10}{'-':>9}{'-':>7}")
+
+    print("\nΔcolor: largest BGR distance between matched cluster centers")
+    print("Δ%: largest difference in cluster share (percentage points)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dominant-color extraction")
+    parser.add_argument("images", nargs="*", help="Image files (default: synthetic leaves at several sizes)")
+    parser.add_argument("--max-reference-mp", type=float, default=4.0,
+                        help="Skip the slow full-resolution reference above this many megapixels")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.images:
+        images = [(path[-24:], cv2.imread(path)) for path in args.images]
+        images = [(name, image) for name, image in images if image is not None]
+    else:
+        images = [(f"synthetic {w}x{h}", synthetic_leaf(h, w)) for h, w in DEFAULT_SIZES]
+
+    run_benchmark(images, args.max_reference_mp, args.repeats)
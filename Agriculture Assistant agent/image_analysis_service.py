@@ -2,14 +2,16 @@ import cv2
 import numpy as np
 from PIL import Image, ImageEnhance
 import json
-from groq import Groq
 import os
-from dotenv import load_dotenv
-import base64
 import io
+from llm_service import get_groq_client
+from stage_runner import start_stages, join_stages
+from image_handle import ImageHandle
 
-load_dotenv()
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+AI_STAGE_TIMEOUT_SECONDS = float(os.getenv("AI_STAGE_TIMEOUT_SECONDS", "20"))
+DOMINANT_COLOR_SAMPLES = int(os.getenv("DOMINANT_COLOR_SAMPLES", "20000"))
+MIN_SPOT_AREA = 50  # original-image pixels; smaller spots are noise
+SPOT_DETAILS_LIMIT = 10
 
 class PlantImageAnalyzer:
     def __init__(self):
@@ -20,26 +22,104 @@ class PlantImageAnalyzer:
             'black_spots': ([0, 0, 0], [180, 255, 50]),
             'healthy_green': ([35, 50, 50], [85, 255, 255])
         }
+        self._build_color_lut()
     
-    def analyze_plant_image(self, image_path: str) -> dict:
-        """Comprehensive plant image analysis"""
+    def _build_color_lut(self):
+        """Per-channel lookup tables: bit i of lut[value, channel] is set when value is inside range i
+        
+        ANDing the three looked-up channels gives every pixel a bitmask of all
+        the color_ranges it falls in (inclusive bounds, exactly like cv2.inRange).
+        """
+        lut = np.zeros((256, 1, 3), dtype=np.uint8)
+        for bit, (lower, upper) in enumerate(self.color_ranges.values()):
+            for channel in range(3):
+                lut[lower[channel]:upper[channel] + 1, 0, channel] |= 1 << bit
+        self._color_lut = lut
+        # Row v says which ranges a combined bitmask value v belongs to
+        values = np.arange(256)[:, None]
+        self._lut_members = (values >> np.arange(len(self.color_ranges))) & 1
+    
+    def _pixel_features(self, image):
+        """Single pass over the frame: one HSV and one gray conversion, all color ranges at once"""
+        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        
+        # Classify every pixel into all ranges in place of one inRange mask per range
+        h_bits, s_bits, v_bits = cv2.split(cv2.LUT(hsv, self._color_lut))
+        cv2.bitwise_and(h_bits, s_bits, dst=h_bits)
+        cv2.bitwise_and(h_bits, v_bits, dst=h_bits)
+        range_counts = np.bincount(h_bits.ravel(), minlength=256) @ self._lut_members
+        
+        return {
+            "gray": gray,
+            "brightness": cv2.mean(gray)[0],
+            "color_percentages": {
+                condition: float(count) / gray.size * 100
+                for condition, count in zip(self.color_ranges, range_counts)
+            }
+        }
+    
+    def _load_analysis_image(self, image, max_dimension=None):
+        """Decoded analysis image for a path, encoded bytes or ImageHandle; see ImageHandle.analysis_image
+        
+        Returns (image, original_size, scale); image is None if it cannot be read.
+        """
+        try:
+            return ImageHandle.wrap(image, max_dimension).analysis_image()
+        except OSError:
+            return None, None, 1.0
+    
+    def analyze_plant_image(self, image_path, max_dimension=None, include_ai=True) -> dict:
+        """Comprehensive plant image analysis
+        
+        ``image_path`` may also be encoded bytes or an ImageHandle shared with
+        other stages (its own max_dimension then applies). ``include_ai=False``
+        skips the Groq call and reports only the OpenCV analysis (used for
+        batch runs over whole field visits).
+        """
         try:
-            # Load and preprocess image
-            image = cv2.imread(image_path)
+            # Read and decode once (downscaled to the analysis resolution); every stage shares it
+            try:
+                handle = ImageHandle.wrap(image_path, max_dimension)
+            except OSError:
+                return {"error": "Could not load image"}
+            image, original_size, scale = handle.analysis_image()
             if image is None:
                 return {"error": "Could not load image"}
             
-            # Basic image analysis
-            basic_analysis = self._basic_image_analysis(image)
+            # The stages are independent: the network-bound AI call overlaps
+            # the OpenCV work on its own pool instead of waiting for it
+            started = {}
+            if include_ai:
+                started.update(start_stages({"ai_analysis": lambda: self._ai_image_analysis(handle)}, io_bound=True))
             
-            # Color analysis for disease detection
-            color_analysis = self._analyze_colors(image)
+            # Color spaces, color ranges and brightness in one pass, shared by the CV stages
+            features = self._pixel_features(image)
+            started.update(start_stages({
+                "basic_analysis": lambda: self._basic_image_analysis(image, features, original_size),
+                "texture_analysis": lambda: self._analyze_texture(image, features["gray"], area_scale=scale ** 2)
+            }))
+            color_analysis = self._analyze_colors(image, features)
+            stages, errors, timings = join_stages(started, timeouts={"ai_analysis": AI_STAGE_TIMEOUT_SECONDS})
             
-            # Texture and pattern analysis
-            texture_analysis = self._analyze_texture(image)
+            # The assessment can do without the AI observations, but not without the CV stages
+            if not include_ai:
+                stages["ai_analysis"] = {
+                    "ai_observations": "AI analysis skipped",
+                    "analysis_confidence": "low"
+                }
+            elif "ai_analysis" in errors:
+                stages["ai_analysis"] = {
+                    "ai_observations": "AI analysis unavailable",
+                    "analysis_confidence": "low",
+                    "error": errors.pop("ai_analysis")
+                }
+            if errors:
+                return {"error": f"Image analysis failed: {'; '.join(errors.values())}"}
             
-            # AI-powered detailed analysis
-            ai_analysis = self._ai_image_analysis(image_path)
+            basic_analysis = stages["basic_analysis"]
+            texture_analysis = stages["texture_analysis"]
+            ai_analysis = stages["ai_analysis"]
             
             return {
                 "success": True,
@@ -49,40 +129,32 @@ class PlantImageAnalyzer:
                 "ai_analysis": ai_analysis,
                 "comprehensive_assessment": self._generate_assessment(
                     basic_analysis, color_analysis, texture_analysis, ai_analysis
-                )
+                ),
+                "stage_timings_ms": timings
             }
             
         except Exception as e:
             return {"error": f"Image analysis failed: {str(e)}"}
     
-    def _basic_image_analysis(self, image):
+    def _basic_image_analysis(self, image, features=None, original_size=None):
         """Basic image properties analysis"""
         height, width = image.shape[:2]
-        
-        # Convert to different color spaces
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-        
-        # Calculate basic statistics
-        brightness = np.mean(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+        original_width, original_height = original_size or (width, height)
+        features = features or self._pixel_features(image)
         
         return {
-            "image_dimensions": {"width": width, "height": height},
-            "brightness_level": float(brightness),
+            "image_dimensions": {"width": original_width, "height": original_height},
+            "analysis_dimensions": {"width": width, "height": height},
+            "brightness_level": float(features["brightness"]),
             "overall_color_distribution": self._get_dominant_colors(image)
         }
     
-    def _analyze_colors(self, image):
+    def _analyze_colors(self, image, features=None):
         """Analyze colors for disease indicators"""
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        features = features or self._pixel_features(image)
         results = {}
         
-        for condition, (lower, upper) in self.color_ranges.items():
-            lower = np.array(lower)
-            upper = np.array(upper)
-            mask = cv2.inRange(hsv, lower, upper)
-            percentage = (np.sum(mask > 0) / mask.size) * 100
-            
+        for condition, percentage in features["color_percentages"].items():
             results[condition] = {
                 "percentage": float(percentage),
                 "severity": "high" if percentage > 15 else "medium" if percentage > 5 else "low"
@@ -90,50 +162,95 @@ class PlantImageAnalyzer:
         
         return results
     
-    def _analyze_texture(self, image):
-        """Analyze texture patterns for disease detection"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    def _analyze_texture(self, image, gray=None, area_scale=1.0):
+        """Analyze texture patterns for disease detection
+        
+        ``area_scale`` converts analysis-pixel areas back to original-image
+        pixels when the image was downscaled for analysis.
+        """
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
         # Edge detection for spot analysis
         edges = cv2.Canny(gray, 50, 150)
-        edge_density = np.sum(edges > 0) / edges.size
+        edge_density = cv2.countNonZero(edges) / edges.size
         
-        # Contour analysis for spot counting
-        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        # Analyze contour properties
-        spot_analysis = []
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > 50:  # Filter small noise
-                perimeter = cv2.arcLength(contour, True)
-                circularity = 4 * np.pi * area / (perimeter * perimeter) if perimeter > 0 else 0
-                
-                spot_analysis.append({
-                    "area": float(area),
-                    "circularity": float(circularity),
-                    "shape": "circular" if circularity > 0.7 else "irregular"
-                })
+        # Lesion statistics for every spot at once; only the largest become dicts
+        areas, perimeters, circularities = self._lesion_statistics(edges, area_scale)
+        largest = np.argsort(areas)[::-1][:SPOT_DETAILS_LIMIT]
+        spot_analysis = [
+            {
+                "area": float(areas[i]),
+                "circularity": float(circularities[i]),
+                "shape": "circular" if circularities[i] > 0.7 else "irregular"
+            }
+            for i in largest
+        ]
         
         return {
             "edge_density": float(edge_density),
-            "spot_count": len(spot_analysis),
-            "spot_details": spot_analysis[:10],  # Top 10 spots
+            "spot_count": int(len(areas)),
+            "spot_details": spot_analysis,  # Top 10 spots by area
             "texture_roughness": self._calculate_texture_roughness(gray)
         }
     
+    def _lesion_statistics(self, edges, area_scale=1.0):
+        """Area, perimeter and circularity arrays for every spot outlined in an edge map
+        
+        Spots are the external contours of the edge map. Their cv2.contourArea
+        and cv2.arcLength values are computed for all contours at once, as
+        shoelace sums and segment lengths over the concatenated points, instead
+        of per contour in Python. Spots under MIN_SPOT_AREA (original-image
+        pixels) are dropped as noise.
+        """
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            empty = np.zeros(0)
+            return empty, empty, empty
+        
+        points = np.concatenate(contours).reshape(-1, 2).astype(np.int64)
+        lengths = np.fromiter(map(len, contours), dtype=np.intp, count=len(contours))
+        ends = np.cumsum(lengths) - 1
+        starts = ends - lengths + 1
+        
+        # Step from each point to the next one along its own closed contour
+        steps = np.empty_like(points)
+        steps[:-1] = points[1:] - points[:-1]
+        steps[ends] = points[starts] - points[ends]
+        x, y = points[:, 0], points[:, 1]
+        dx, dy = steps[:, 0], steps[:, 1]
+        
+        areas = np.abs(np.add.reduceat(x * dy - dx * y, starts)) / 2 * area_scale
+        keep = areas > MIN_SPOT_AREA
+        areas = areas[keep]
+        
+        # Perimeters only for the spots that are kept (most contours on noisy leaves are not)
+        kept_points = np.repeat(keep, lengths)
+        kept_starts = np.cumsum(lengths[keep]) - lengths[keep]
+        step_lengths = np.hypot(dx[kept_points], dy[kept_points])
+        perimeters = (np.add.reduceat(step_lengths, kept_starts) if len(areas) else np.zeros(0)) * np.sqrt(area_scale)
+        circularities = np.where(perimeters > 0, 4 * np.pi * areas / np.maximum(perimeters, 1e-9) ** 2, 0.0)
+        return areas, perimeters, circularities
+    
     def _calculate_texture_roughness(self, gray_image):
         """Calculate texture roughness using local binary patterns"""
-        # Simple texture measure using standard deviation
-        kernel = np.ones((5,5), np.float32) / 25
-        smooth = cv2.filter2D(gray_image, -1, kernel)
-        roughness = np.std(gray_image - smooth)
-        return float(roughness)
+        # Simple texture measure: spread of the (uint8, wrapping) difference from a 5x5 box blur
+        smooth = cv2.blur(gray_image, (5, 5))
+        _, stddev = cv2.meanStdDev(gray_image - smooth)
+        return float(stddev[0][0])
     
     def _get_dominant_colors(self, image):
-        """Get dominant colors in the image"""
+        """Get dominant colors in the image
+        
+        KMeans runs on a fixed-size, seeded random sample of pixels, so the cost
+        no longer grows with resolution; cluster shares are estimated from the
+        same sample (within about a percentage point at the default size).
+        """
         # Reshape image to be a list of pixels
         pixels = image.reshape(-1, 3)
+        if len(pixels) > DOMINANT_COLOR_SAMPLES:
+            rng = np.random.default_rng(42)
+            pixels = pixels[rng.integers(0, len(pixels), DOMINANT_COLOR_SAMPLES)]
         
         # Use k-means to find dominant colors
         from sklearn.cluster import KMeans
@@ -141,19 +258,18 @@ class PlantImageAnalyzer:
         kmeans.fit(pixels)
         
         colors = kmeans.cluster_centers_.astype(int)
-        percentages = np.bincount(kmeans.labels_) / len(kmeans.labels_) * 100
+        percentages = np.bincount(kmeans.labels_, minlength=len(colors)) / len(kmeans.labels_) * 100
         
         return [
             {"color_bgr": color.tolist(), "percentage": float(pct)}
             for color, pct in zip(colors, percentages)
         ]
     
-    def _ai_image_analysis(self, image_path):
+    def _ai_image_analysis(self, image):
         """AI-powered detailed image analysis using Groq"""
         try:
-            # Convert image to base64 for AI analysis
-            with open(image_path, "rb") as image_file:
-                image_data = base64.b64encode(image_file.read()).decode()
+            # Base64 of the bytes already in memory (encoded once per handle)
+            image_data = ImageHandle.wrap(image).base64()
             
             prompt = """
             Analyze this plant image and provide detailed information about:
@@ -185,7 +301,7 @@ class PlantImageAnalyzer:
             Provide detailed, specific observations in JSON format.
             """
             
-            response = groq_client.chat.completions.create(
+            response = get_groq_client().chat.completions.create(
                 messages=[
                     {
                         "role": "user", 
@@ -276,6 +392,6 @@ class PlantImageAnalyzer:
 # Initialize the analyzer
 plant_analyzer = PlantImageAnalyzer()
 
-def analyze_plant_image_comprehensive(image_path: str) -> dict:
-    """Main function for comprehensive plant image analysis"""
+def analyze_plant_image_comprehensive(image_path) -> dict:
+    """Main function for comprehensive plant image analysis (path, bytes or ImageHandle)"""
     return plant_analyzer.analyze_plant_image(image_path)
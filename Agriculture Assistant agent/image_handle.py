@@ -0,0 +1,107 @@
+import os
+import io
+import sys
+import base64
+import threading
+
+# The CNN input comes from the shared preprocessing in models/image_preprocessing.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models'))
+
+# Longest image side used for analysis (0 = full resolution)
+ANALYSIS_MAX_DIMENSION = int(os.getenv("ANALYSIS_MAX_DIMENSION", "1024"))
+MODEL_IMAGE_SIZE = 224
+
+
+class ImageHandle:
+    """One uploaded image, read once and decoded once, shared by the ML, CV and AI stages
+
+    Built from a path or from in-memory bytes (no temp file needed). The
+    encoded bytes are kept as-is and each view is decoded from them at most
+    once: the analysis image for the OpenCV stages, and the CNN input through
+    image_preprocessing.decode_leaf_image, the same path the predictor, bulk
+    prediction and TTA use. Views are cached and safe to request from
+    concurrent stages.
+    """
+
+    def __init__(self, data, name=None, max_dimension=None):
+        self.data = bytes(data)
+        self.name = name or "<bytes>"
+        self.max_dimension = ANALYSIS_MAX_DIMENSION if max_dimension is None else max_dimension
+        self._lock = threading.RLock()
+        self._views = {}
+
+    @classmethod
+    def from_path(cls, image_path, max_dimension=None):
+        with open(image_path, "rb") as image_file:
+            return cls(image_file.read(), name=image_path, max_dimension=max_dimension)
+
+    @classmethod
+    def wrap(cls, source, max_dimension=None):
+        """Accept an ImageHandle, a path or encoded bytes"""
+        if isinstance(source, ImageHandle):
+            return source
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return cls(source, max_dimension=max_dimension)
+        return cls.from_path(source, max_dimension=max_dimension)
+
+    def _view(self, key, build):
+        with self._lock:
+            if key not in self._views:
+                self._views[key] = build()
+            return self._views[key]
+
+    def analysis_image(self):
+        """(BGR image, original (width, height), scale); the image is None if the bytes cannot be decoded
+
+        scale is original pixels per analysis pixel along each axis.
+        """
+        return self._view("analysis", self._decode)
+
+    def model_input(self, size=MODEL_IMAGE_SIZE):
+        """(size, size, 3) uint8 RGB for the CNN, from the shared leaf preprocessing"""
+        from image_preprocessing import decode_leaf_image
+        return self._view(("model", size), lambda: decode_leaf_image(self.data, size))
+
+    def base64(self):
+        """The encoded bytes as base64 text, for LLM requests"""
+        return self._view("base64", lambda: base64.b64encode(self.data).decode())
+
+    def _decode(self):
+        """Decode once, already downscaled so the longest side is at most max_dimension"""
+        import numpy as np
+        import cv2
+        from PIL import Image
+
+        try:
+            # Header only, nothing is decoded here
+            with Image.open(io.BytesIO(self.data)) as header:
+                original_size = header.size
+        except Exception:
+            original_size = None
+
+        flags = cv2.IMREAD_COLOR
+        if self.max_dimension and original_size:
+            # Let the decoder downscale (JPEG DCT scaling) as far as the target allows
+            for factor, reduced_flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                                         (2, cv2.IMREAD_REDUCED_COLOR_2)):
+                if max(original_size) // factor >= self.max_dimension:
+                    flags = reduced_flag
+                    break
+
+        image = cv2.imdecode(np.frombuffer(self.data, np.uint8), flags)
+        if image is None:
+            return None, None, 1.0
+
+        height, width = image.shape[:2]
+        if self.max_dimension and max(height, width) > self.max_dimension:
+            ratio = self.max_dimension / max(height, width)
+            image = cv2.resize(image, (max(1, round(width * ratio)), max(1, round(height * ratio))),
+                               interpolation=cv2.INTER_AREA)
+
+        height, width = image.shape[:2]
+        if original_size is None:
+            original_size = (width, height)
+        elif (width > height) != (original_size[0] > original_size[1]):
+            # The decoder applied an EXIF rotation
+            original_size = original_size[::-1]
+        return image, original_size, max(original_size) / max(height, width)
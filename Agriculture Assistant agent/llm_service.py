@@ -0,0 +1,245 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_groq_client = None
+_groq_lock = threading.Lock()
+
+
+def get_groq_client():
+    """Shared Groq client, created (and the groq SDK imported) on first use"""
+    global _groq_client
+    if _groq_client is None:
+        with _groq_lock:
+            if _groq_client is None:
+                from groq import Groq
+                _groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _groq_client
+
+
+LLM_MODEL = "llama-3.1-8b-instant"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))
+# SQLite file shared by all agent processes ("" = memory only)
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "")
+LLM_CACHE_DEFAULT_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "24"))
+
+# How long an answer stays valid depends on how fast its inputs change
+LLM_CACHE_TTL_HOURS = {
+    "analyze_crop_health_with_ai": 24 * 7,
+    "generate_farming_plan": 24 * 7,
+    "pest_disease_advisor": 24 * 7,
+    "soil_analysis_advisor": 24 * 30,
+    "market_price_advisor": 6,
+    "weather_farming_advisor": 1,
+    "recommend_suitable_crops": 12
+}
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace and case so near-identical questions share a cache entry"""
+    return " ".join(prompt.split()).lower()
+
+
+def make_llm_cache_key(tool, prompt, model, temperature):
+    digest = hashlib.sha256()
+    for part in (tool, model, f"{temperature:g}", normalize_prompt(prompt)):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """Two-tier cache for LLM completions
+
+    Completions live in a bounded in-memory LRU and, when ``db_path`` is set,
+    in a SQLite table shared across processes. Every entry expires after its
+    tool's TTL. Hits and misses are counted per tool.
+    """
+
+    def __init__(self, max_entries=LLM_CACHE_SIZE, db_path=LLM_CACHE_DB):
+        self.max_entries = max_entries
+        self.db_path = db_path or None
+        self._memory = OrderedDict()
+        # Guards the memory tier and counters only; SQLite I/O runs outside it
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {}
+
+    def _connection(self):
+        # One connection per thread, opened on first use
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS llm_responses "
+                       "(key TEXT PRIMARY KEY, tool TEXT, content TEXT, expires_at REAL)")
+            self._local.db = db
+        return db
+
+    def _count(self, tool, outcome):
+        counters = self._counters.setdefault(tool, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def _remember(self, key, content, expires_at):
+        self._memory[key] = (content, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, tool, key):
+        """Return the cached completion text, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                self._count(tool, "memory_hits")
+                return entry[0]
+            self._memory.pop(key, None)
+
+        row = None
+        if self.db_path:
+            try:
+                row = self._connection().execute(
+                    "SELECT content, expires_at FROM llm_responses WHERE key = ? AND expires_at > ?",
+                    (key, now)).fetchone()
+            except sqlite3.Error:
+                row = None
+
+        with self._lock:
+            if row is not None:
+                self._remember(key, *row)
+                self._count(tool, "disk_hits")
+                return row[0]
+            self._count(tool, "misses")
+            return None
+
+    def put(self, tool, key, content, ttl_hours):
+        expires_at = time.time() + ttl_hours * 3600
+        with self._lock:
+            self._remember(key, content, expires_at)
+        if self.db_path:
+            try:
+                with self._connection() as db:
+                    db.execute("INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?)",
+                               (key, tool, content, expires_at))
+            except sqlite3.Error:
+                pass
+
+    def purge_expired(self):
+        """Delete expired on-disk entries; returns how many were removed"""
+        if not self.db_path:
+            return 0
+        with self._connection() as db:
+            return db.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def clear(self):
+        """Drop the in-memory tier (the disk tier expires on its own)"""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self):
+        with self._lock:
+            totals = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+            for counters in self._counters.values():
+                for name, value in counters.items():
+                    totals[name] += value
+            return dict(totals, memory_entries=len(self._memory), disk_enabled=bool(self.db_path),
+                        per_tool={tool: dict(counters) for tool, counters in self._counters.items()})
+
+
+# Shared LLM response cache for this process
+llm_cache = LLMResponseCache()
+
+
+def cached_completion(tool, prompt, model=LLM_MODEL, temperature=0.3, validate=None):
+    """Completion text for a single-message prompt, answered from llm_cache when possible
+
+    ``validate`` (e.g. json.loads) is called on a fresh completion; if it
+    raises, the error propagates and the completion is not cached.
+    """
+    key = make_llm_cache_key(tool, prompt, model, temperature)
+    content = llm_cache.get(tool, key)
+    if content is not None:
+        return content
+
+    response = get_groq_client().chat.completions.create(
+        messages=[{"role": "user", "content": prompt}],
+        model=model,
+        temperature=temperature
+    )
+    content = response.choices[0].message.content
+    if validate is not None:
+        validate(content)
+    llm_cache.put(tool, key, content, LLM_CACHE_TTL_HOURS.get(tool, LLM_CACHE_DEFAULT_TTL_HOURS))
+    return content
+
+
+def stream_completion(tool, prompt, model=LLM_MODEL, temperature=0.3, validate=None):
+    """Streaming counterpart of cached_completion: yields completion text chunks as Groq produces them
+
+    A cached completion is yielded as a single chunk. The assembled text is
+    validated and cached once the stream ends, so an interrupted stream is
+    never cached.
+    """
+    key = make_llm_cache_key(tool, prompt, model, temperature)
+    content = llm_cache.get(tool, key)
+    if content is not None:
+        yield content
+        return
+
+    stream = get_groq_client().chat.completions.create(
+        messages=[{"role": "user", "content": prompt}],
+        model=model,
+        temperature=temperature,
+        stream=True
+    )
+    chunks = []
+    for chunk in stream:
+        text = chunk.choices[0].delta.content if chunk.choices else None
+        if text:
+            chunks.append(text)
+            yield text
+
+    content = "".join(chunks)
+    if validate is not None:
+        validate(content)
+    llm_cache.put(tool, key, content, LLM_CACHE_TTL_HOURS.get(tool, LLM_CACHE_DEFAULT_TTL_HOURS))
+
+
+class StreamAssembler:
+    """Builds the full completion from streamed chunks and splits off sections as they complete
+
+    A section is a paragraph (text up to a blank line), which is how the
+    advisors' numbered answers are laid out.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._pending = ""
+        self._started = time.perf_counter()
+        self.first_chunk_ms = None
+
+    def feed(self, chunk):
+        """Add a chunk; returns the sections it completed"""
+        if self.first_chunk_ms is None:
+            self.first_chunk_ms = round((time.perf_counter() - self._started) * 1000, 1)
+        self._chunks.append(chunk)
+        self._pending += chunk
+        *sections, self._pending = self._pending.split("\n\n")
+        return [section.strip() for section in sections if section.strip()]
+
+    def close(self):
+        """The trailing section, once the stream has ended"""
+        section, self._pending = self._pending.strip(), ""
+        return [section] if section else []
+
+    @property
+    def text(self):
+        return "".join(self._chunks)
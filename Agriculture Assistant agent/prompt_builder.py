@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import logging
+import textwrap
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Input-token budget per tool (estimated tokens for the whole prompt)
+PROMPT_TOKEN_BUDGETS = {
+    "weather_farming_advisor": int(os.getenv("WEATHER_PROMPT_TOKEN_BUDGET", "700")),
+    "recommend_suitable_crops": int(os.getenv("CROP_PROMPT_TOKEN_BUDGET", "900"))
+}
+DEFAULT_PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "1000"))
+SEARCH_SNIPPET_CHARS = 240
+
+# Values weather_service fills in when the API gave nothing real
+PLACEHOLDER_DESCRIPTIONS = {"current conditions", "forecast"}
+PLACEHOLDER_PRESSURE = 1013
+
+# Words, digit groups (numbers tokenize in runs of up to three digits) and single symbols
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]|_")
+
+_stats_lock = threading.Lock()
+_token_stats = {}
+
+
+def estimate_tokens(text):
+    """Local estimate of LLM tokens, close to a BPE count for English prose, numbers and JSON"""
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        # Long words are split into several subword tokens
+        tokens += 1 + (len(piece) - 1) // 6 if piece.isalpha() else 1
+    return tokens
+
+
+def compact_json(data):
+    """JSON without indentation or spaces after separators"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def summarize_current_weather(current):
+    """The fields of a weather_service current-weather dict that carry information"""
+    main = current.get("main", {})
+    summary = {
+        "temp_c": main.get("temp"),
+        "humidity_pct": main.get("humidity"),
+        "wind_speed": (current.get("wind") or {}).get("speed")
+    }
+    if main.get("pressure") not in (None, PLACEHOLDER_PRESSURE):
+        summary["pressure_hpa"] = main["pressure"]
+    description = ((current.get("weather") or [{}])[0]).get("description")
+    if description and description not in PLACEHOLDER_DESCRIPTIONS:
+        summary["conditions"] = description
+    return {key: value for key, value in summary.items() if value is not None}
+
+
+def forecast_rows(forecast):
+    """A weather_service forecast as a dense table: (header, rows) of date|max_c|min_c[|conditions]
+
+    The conditions column is only included when some day has a real
+    description; days without one then leave it empty.
+    """
+    rows, conditions = [], []
+    for day in forecast.get("list", []):
+        main = day.get("main", {})
+        rows.append([str(day.get("dt_txt", ""))[:10], _number(main.get("temp_max")), _number(main.get("temp_min"))])
+        description = ((day.get("weather") or [{}])[0]).get("description")
+        conditions.append(description if description and description not in PLACEHOLDER_DESCRIPTIONS else "")
+
+    header = "date|max_c|min_c"
+    if any(conditions):
+        header += "|conditions"
+        rows = [row + [condition] for row, condition in zip(rows, conditions)]
+    return header, ["|".join(row) for row in rows]
+
+
+def search_result_rows(results, limit=3):
+    """Serper organic results reduced to one 'title: snippet' line each"""
+    rows = []
+    for result in results[:limit]:
+        snippet = " ".join(str(result.get("snippet", "")).split())
+        if len(snippet) > SEARCH_SNIPPET_CHARS:
+            snippet = snippet[:SEARCH_SNIPPET_CHARS].rsplit(" ", 1)[0] + "…"
+        rows.append(f"- {result.get('title', '')}: {snippet}")
+    return rows
+
+
+def _number(value):
+    return "" if value is None else f"{value:g}" if isinstance(value, (int, float)) else str(value)
+
+
+class PromptBuilder:
+    """Assembles a prompt from instructions and data sections within a tool's token budget
+
+    Sections are added in priority order. While the estimate is over budget,
+    rows are dropped from the end of the lowest-priority section that still
+    has more than its ``min_rows``.
+    """
+
+    def __init__(self, tool, budget=None):
+        self.tool = tool
+        self.budget = budget or PROMPT_TOKEN_BUDGETS.get(tool, DEFAULT_PROMPT_TOKEN_BUDGET)
+        self._sections = []
+
+    def add(self, label, rows, header=None, min_rows=1):
+        """Add a section: a label line, an optional table header and its rows (a string is one row)"""
+        inline = isinstance(rows, str)
+        rows = [rows] if inline else list(rows)
+        self._sections.append({"label": label, "header": header, "rows": rows, "min_rows": min_rows, "inline": inline})
+        return self
+
+    def _render(self, instructions):
+        parts = []
+        for section in self._sections:
+            if not section["rows"]:
+                continue
+            if section["inline"]:
+                parts.append(f"{section['label']}: {section['rows'][0]}")
+            else:
+                lines = [f"{section['label']}:"] + ([section["header"]] if section["header"] else []) + section["rows"]
+                parts.append("\n".join(lines))
+        return "\n".join(parts) + "\n\n" + instructions
+
+    def build(self, instructions):
+        """Render the prompt, trimmed to the budget, and record its token estimate"""
+        instructions = textwrap.dedent(instructions).strip()
+        prompt = self._render(instructions)
+        tokens = estimate_tokens(prompt)
+        trimmed = 0
+
+        while tokens > self.budget:
+            section = next((s for s in reversed(self._sections) if len(s["rows"]) > s["min_rows"]), None)
+            if section is None:
+                break
+            section["rows"].pop()
+            trimmed += 1
+            prompt = self._render(instructions)
+            tokens = estimate_tokens(prompt)
+
+        _record(self.tool, tokens)
+        logger.info("%s prompt: ~%d tokens (budget %d, %d rows trimmed)", self.tool, tokens, self.budget, trimmed)
+        if tokens > self.budget:
+            logger.warning("%s prompt still ~%d tokens over budget after trimming", self.tool, tokens - self.budget)
+        return prompt
+
+
+def _record(tool, tokens):
+    with _stats_lock:
+        stats = _token_stats.setdefault(tool, {"calls": 0, "total_tokens": 0, "max_tokens": 0})
+        stats["calls"] += 1
+        stats["total_tokens"] += tokens
+        stats["max_tokens"] = max(stats["max_tokens"], tokens)
+
+
+def prompt_token_stats():
+    """Per-tool prompt token estimates recorded by PromptBuilder.build"""
+    with _stats_lock:
+        return {tool: dict(stats, mean_tokens=stats["total_tokens"] / stats["calls"])
+                for tool, stats in _token_stats.items()}
@@ -0,0 +1,75 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+STAGE_WORKERS = int(os.getenv("ANALYSIS_STAGE_WORKERS", "8"))
+IO_STAGE_WORKERS = int(os.getenv("ANALYSIS_IO_STAGE_WORKERS", "16"))
+STAGE_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_STAGE_TIMEOUT_SECONDS", "30"))
+# How long a stage may wait for a free worker before it is given up on
+STAGE_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ANALYSIS_STAGE_QUEUE_TIMEOUT_SECONDS", "30"))
+
+# OpenCV, TensorFlow and HTTP calls all release the GIL, so threads overlap well.
+# Stages must be leaf work: a stage that waits on other stages could hold the
+# pool slot they need. Network-bound stages (Groq calls) get their own pool so
+# hung requests, which keep their slot after timing out, never starve the CPU
+# stages of later requests.
+_executor = ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="analysis-stage")
+_io_executor = ThreadPoolExecutor(max_workers=IO_STAGE_WORKERS, thread_name_prefix="analysis-io-stage")
+
+
+def _timed(fn, clock):
+    clock["started_at"] = time.monotonic()
+    clock["started"].set()
+    result = fn()
+    return result, (time.monotonic() - clock["started_at"]) * 1000
+
+
+def start_stages(stages, io_bound=False):
+    """Submit independent stages ({name: zero-arg callable}) to the CPU pool, or the network pool if io_bound"""
+    executor = _io_executor if io_bound else _executor
+    started = {}
+    for name, fn in stages.items():
+        clock = {"started": threading.Event(), "started_at": None}
+        started[name] = (executor.submit(_timed, fn, clock), time.monotonic(), clock)
+    return started
+
+
+def join_stages(started, timeouts=None, default_timeout=STAGE_TIMEOUT_SECONDS,
+                queue_timeout=STAGE_QUEUE_TIMEOUT_SECONDS):
+    """Wait for started stages, each bounded by its own timeout from when it began running
+
+    Returns (results, errors, timings_ms). timings_ms holds each stage's run
+    time under its name and its wait for a free worker under "<name>_queue".
+    A stage that raised, ran out of time, or did not get a worker within
+    ``queue_timeout`` appears in ``errors`` with a message instead of in
+    ``results``; a timed-out stage keeps running in the background but its
+    result is dropped.
+    """
+    timeouts = timeouts or {}
+    results, errors, timings = {}, {}, {}
+
+    for name, (future, submitted_at, clock) in started.items():
+        timeout = timeouts.get(name, default_timeout)
+        if not clock["started"].wait(max(0.0, submitted_at + queue_timeout - time.monotonic())):
+            future.cancel()
+            timings[f"{name}_queue"] = round((time.monotonic() - submitted_at) * 1000, 1)
+            errors[name] = f"{name} did not start within {queue_timeout:g}s (stage pool busy)"
+            continue
+
+        timings[f"{name}_queue"] = round(max(0.0, clock["started_at"] - submitted_at) * 1000, 1)
+        remaining = max(0.0, clock["started_at"] + timeout - time.monotonic())
+        try:
+            results[name], timings[name] = future.result(timeout=remaining)
+            timings[name] = round(timings[name], 1)
+        except FutureTimeoutError:
+            errors[name] = f"{name} timed out after {timeout:g}s"
+        except Exception as e:
+            errors[name] = str(e)
+
+    return results, errors, timings
+
+
+def run_stages(stages, timeouts=None, default_timeout=STAGE_TIMEOUT_SECONDS, io_bound=False):
+    """Run independent stages concurrently and join them; see join_stages"""
+    return join_stages(start_stages(stages, io_bound), timeouts, default_timeout)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test script for the single-pass color classification
+Checks the lookup-table color percentages against per-range cv2.inRange masks
+"""
+
+import sys
+import numpy as np
+import cv2
+sys.path.append('.')
+
+from image_analysis_service import PlantImageAnalyzer
+from benchmark_dominant_colors import synthetic_leaf
+
+
+def inrange_percentages(analyzer, image):
+    """The previous implementation: one cv2.inRange mask per color range"""
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    return {
+        condition: cv2.countNonZero(cv2.inRange(hsv, np.array(lower), np.array(upper))) / hsv[:, :, 0].size * 100
+        for condition, (lower, upper) in analyzer.color_ranges.items()
+    }
+
+
+def test_color_ranges_match_inrange():
+    """The lookup-table classification must give exactly the inRange percentages"""
+    print("🎨 Testing color range classification")
+    print("=" * 60)
+
+    analyzer = PlantImageAnalyzer()
+    for seed, (height, width) in enumerate([(240, 320), (480, 640), (97, 131)]):
+        image = synthetic_leaf(height, width, seed)
+        expected = inrange_percentages(analyzer, image)
+        actual = analyzer._pixel_features(image)["color_percentages"]
+        for condition, percentage in expected.items():
+            print(f"   {height}x{width} {condition}: inRange {percentage:.4f}%, LUT {actual[condition]:.4f}%")
+            assert abs(actual[condition] - percentage) < 1e-9, f"{condition} differs on {height}x{width}"
+    print("✅ Color percentages match cv2.inRange")
+
+if __name__ == "__main__":
+    test_color_ranges_match_inrange()
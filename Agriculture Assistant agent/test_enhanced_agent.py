@@ -14,6 +14,12 @@ def test_ml_integration():
     
     try:
         from tools import predict_plant_disease, predict_crop_yield
+        from model_registry import warmup_models
+        
+        # Warm the model registry so predictions below skip model loading
+        print("\n📦 Model Registry Status:")
+        for name, info in warmup_models().items():
+            print(f"   {name}: {info['state']}")
         
         # Test plant disease prediction (if test images exist)
         test_image_dir = "../dataset/Plant Diseases Dataset/test/test"
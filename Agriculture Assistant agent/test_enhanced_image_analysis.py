@@ -14,6 +14,12 @@ def test_enhanced_image_analysis():
     
     try:
         from tools import predict_plant_disease
+        from model_registry import warmup_models
+        
+        # Warm the model registry so predictions below skip model loading
+        print("\n📦 Model Registry Status:")
+        for name, info in warmup_models().items():
+            print(f"   {name}: {info['state']}")
         from image_analysis_service import analyze_plant_image_comprehensive
         
         # Test image analysis service
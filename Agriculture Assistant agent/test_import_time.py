@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the agent tools
+Guards that importing tools.py stays cheap: heavy libraries load on first use
+"""
+
+import os
+import sys
+import json
+import subprocess
+sys.path.append('.')
+
+AGENT_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ['tensorflow', 'keras', 'cv2', 'sklearn', 'groq', 'joblib', 'numpy', 'PIL']
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "2.0"))
+
+# Runs in a fresh interpreter so nothing is already cached in sys.modules
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import tools
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % HEAVY_MODULES
+
+
+def measure_tools_import():
+    """Import tools.py in a subprocess; returns seconds taken and heavy modules loaded"""
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=AGENT_DIR, capture_output=True,
+                            text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_import_time():
+    """Importing the tools must not pull in ML, vision or LLM client libraries"""
+    print("⏱️  Testing Agent Tools Import Time")
+    print("=" * 60)
+
+    result = measure_tools_import()
+    print(f"   import tools: {result['seconds'] * 1000:.0f} ms (budget {IMPORT_TIME_BUDGET_SECONDS * 1000:.0f} ms)")
+    print(f"   heavy modules loaded: {result['loaded'] or 'none'}")
+
+    assert not result["loaded"], f"tools.py imported heavy modules at import time: {result['loaded']}"
+    assert result["seconds"] < IMPORT_TIME_BUDGET_SECONDS, f"import tools took {result['seconds']:.2f}s"
+    print("✅ Tools import stays lightweight")
+
+if __name__ == "__main__":
+    test_import_time()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for the vectorized lesion statistics
+Checks spot areas, perimeters, circularity and spot_count against the
+per-contour cv2.contourArea / cv2.arcLength loop and on known shapes
+"""
+
+import sys
+import numpy as np
+import cv2
+sys.path.append('.')
+
+from image_analysis_service import PlantImageAnalyzer, MIN_SPOT_AREA
+from benchmark_dominant_colors import synthetic_leaf
+
+
+def contour_loop_statistics(edges):
+    """The previous implementation: one contourArea and arcLength call per contour"""
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    spots = []
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area > MIN_SPOT_AREA:
+            perimeter = cv2.arcLength(contour, True)
+            spots.append((area, perimeter, 4 * np.pi * area / (perimeter * perimeter) if perimeter > 0 else 0))
+    return np.array(spots).reshape(-1, 3)
+
+
+def test_lesion_statistics():
+    """Spot areas, circularity and spot_count on synthetic leaves and drawn shapes"""
+    print("🔍 Testing lesion statistics")
+    print("=" * 60)
+
+    analyzer = PlantImageAnalyzer()
+    for seed, (height, width) in enumerate([(480, 640), (1200, 1600)]):
+        gray = cv2.cvtColor(synthetic_leaf(height, width, seed), cv2.COLOR_BGR2GRAY)
+        edges = cv2.Canny(gray, 50, 150)
+        expected = contour_loop_statistics(edges)
+        areas, perimeters, circularities = analyzer._lesion_statistics(edges)
+        print(f"   {height}x{width}: {len(areas)} spots (contour loop: {len(expected)})")
+        assert len(areas) == len(expected), "spot count must match the contour loop"
+        assert np.allclose(areas, expected[:, 0])
+        assert np.allclose(perimeters, expected[:, 1])
+        assert np.allclose(circularities, expected[:, 2])
+
+    edges = np.zeros((200, 300), np.uint8)
+    cv2.circle(edges, (60, 100), 40, 255, 1)
+    cv2.rectangle(edges, (150, 50), (249, 149), 255, 1)
+    cv2.circle(edges, (280, 20), 2, 255, 1)  # Under MIN_SPOT_AREA: noise
+
+    areas, perimeters, circularities = analyzer._lesion_statistics(edges)
+    order = np.argsort(areas)
+    print(f"   areas: {areas[order].round(1).tolist()}, circularities: {circularities[order].round(3).tolist()}")
+
+    assert len(areas) == 2, f"expected 2 spots, got {len(areas)}"
+    circle, square = order
+    assert abs(areas[circle] - np.pi * 40 ** 2) / (np.pi * 40 ** 2) < 0.03
+    assert areas[square] == 99 ** 2
+    assert circularities[circle] > 0.85, "a circle must read as circular"
+    assert abs(circularities[square] - np.pi / 4) < 0.01
+
+    # Downscaled analysis reports original-image areas
+    scaled_areas, _, _ = analyzer._lesion_statistics(edges, area_scale=4.0)
+    assert np.allclose(scaled_areas, areas * 4.0)
+    assert len(analyzer._lesion_statistics(np.zeros((20, 20), np.uint8))[0]) == 0
+
+    # spot_count comes from the same statistics
+    image = np.full((200, 300, 3), (40, 140, 60), np.uint8)
+    for center in [(50, 50), (150, 60), (240, 140)]:
+        cv2.circle(image, center, 25, (20, 20, 20), -1)
+    texture = analyzer._analyze_texture(image)
+    print(f"   spot_count on 3 drawn spots: {texture['spot_count']}")
+    assert texture["spot_count"] == 3
+    assert len(texture["spot_details"]) == 3
+    assert all(spot["shape"] == "circular" for spot in texture["spot_details"])
+    print("✅ Lesion statistics match the contour loop")
+
+if __name__ == "__main__":
+    test_lesion_statistics()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for the LLM response cache
+Checks memory and SQLite hits, LRU eviction and per-tool TTL expiry of LLMResponseCache
+"""
+
+import os
+import sys
+import tempfile
+sys.path.append('.')
+
+from llm_service import LLMResponseCache, make_llm_cache_key, LLM_MODEL
+
+
+def test_llm_response_cache():
+    """Memory and SQLite hits, LRU eviction and TTL expiry"""
+    print("🤖 Testing LLM response cache")
+    print("=" * 60)
+
+    # Prompts differing only in whitespace and case share an entry
+    key = make_llm_cache_key("weather", "Irrigate  today?", LLM_MODEL, 0.3)
+    assert key == make_llm_cache_key("weather", "irrigate today?", LLM_MODEL, 0.3)
+    assert key != make_llm_cache_key("crops", "irrigate today?", LLM_MODEL, 0.3)
+    assert key != make_llm_cache_key("weather", "irrigate today?", LLM_MODEL, 0.7)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        db_path = os.path.join(cache_dir, "llm_cache.sqlite3")
+        cache = LLMResponseCache(max_entries=2, db_path=db_path)
+        assert cache.get("weather", "k1") is None
+        cache.put("weather", "k1", "irrigate tomorrow", ttl_hours=1)
+        assert cache.get("weather", "k1") == "irrigate tomorrow"
+
+        cache.put("weather", "k2", "a", ttl_hours=1)
+        cache.put("weather", "k3", "b", ttl_hours=1)
+        assert "k1" not in cache._memory, "least recently used entry must be evicted"
+        assert cache.get("weather", "k1") == "irrigate tomorrow", "evicted entry must come back from SQLite"
+
+        # A second process sees the shared table
+        other = LLMResponseCache(max_entries=2, db_path=db_path)
+        assert other.get("weather", "k2") == "a"
+        assert other.stats()["disk_hits"] == 1
+
+        cache.put("crops", "k4", "plant maize", ttl_hours=-1)
+        assert cache.get("crops", "k4") is None, "expired entry must miss"
+        assert other.get("crops", "k4") is None
+        assert cache.purge_expired() == 1
+
+        stats = cache.stats()
+        print(f"   {stats}")
+        assert stats["per_tool"]["crops"]["misses"] == 1
+        assert stats["memory_hits"] >= 1 and stats["disk_hits"] >= 1
+
+    memory_only = LLMResponseCache(max_entries=2, db_path="")
+    memory_only.put("weather", "k1", "text", ttl_hours=1)
+    assert memory_only.get("weather", "k1") == "text"
+    assert memory_only.purge_expired() == 0
+    print("✅ LLM response cache hits, evicts and expires")
+
+if __name__ == "__main__":
+    test_llm_response_cache()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Tiled analysis for drone and orthomosaic field images
+
+The image is never decoded as a whole: it is opened as a windowed array
+(.npy memmap, uncompressed raster memmap, or tifffile/zarr for compressed
+TIFFs when installed) and cut into tiles that are read, analyzed by
+PlantImageAnalyzer's color and texture stages and dropped, a bounded number
+at a time. The result is a per-tile disease-indicator heatmap plus
+field-level aggregates, e.g.:
+
+    python tiled_image_analysis.py field_12_ortho.tif -o field_12.json --heatmap field_12.png
+    python tiled_image_analysis.py field_12_ortho.npy --tile-size 2048 --workers 8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import cv2
+from PIL import Image
+sys.path.append('.')
+
+from image_analysis_service import plant_analyzer
+
+TILE_SIZE = int(os.getenv("TILE_SIZE", "1024"))
+TILE_WORKERS = int(os.getenv("TILE_WORKERS", "0"))  # 0 = one per core
+# Images without a windowed reader are decoded whole only up to this size
+FULL_DECODE_MAX_PIXELS = int(os.getenv("FULL_DECODE_MAX_PIXELS", "100000000"))
+MIN_VALID_FRACTION = 0.1  # tiles that are mostly nodata (outside the field) are skipped
+HOTSPOT_LIMIT = 10
+DISEASE_CONDITIONS = ['brown_spots', 'yellow_areas', 'white_powdery', 'black_spots']
+SEVERITY_LEVELS = ['minimal', 'mild', 'moderate', 'severe']
+# PIL raw modes that can be memory-mapped directly: (channels, channel order)
+RAW_MODES = {'RGB': (3, 'RGB'), 'RGBA': (4, 'RGBA'), 'RGBX': (4, 'RGBX'), 'BGR': (3, 'BGR'), 'L': (1, 'L')}
+
+# Orthomosaics are far beyond PIL's decompression-bomb limit; only headers
+# are parsed here and whole decodes are capped by FULL_DECODE_MAX_PIXELS
+Image.MAX_IMAGE_PIXELS = None
+
+
+class WindowedImage:
+    """A lazily read (height, width[, channels]) uint8 array plus its channel order"""
+
+    def __init__(self, array, channel_order):
+        self.array = array
+        self.channel_order = channel_order
+        self.height, self.width = array.shape[:2]
+
+    def read_bgr(self, y0, y1, x0, x1):
+        """Read one window as BGR plus a mask of pixels that hold data (None when all do)"""
+        window = np.asarray(self.array[y0:y1, x0:x1])
+        if self.channel_order == 'L':
+            window = cv2.cvtColor(window.reshape(window.shape[:2]), cv2.COLOR_GRAY2BGR)
+        elif self.channel_order == 'RGB':
+            window = cv2.cvtColor(window, cv2.COLOR_RGB2BGR)
+        elif self.channel_order == 'RGBX':
+            window = cv2.cvtColor(window[..., :3], cv2.COLOR_RGB2BGR)
+        elif self.channel_order == 'RGBA':
+            valid = window[..., 3] > 0
+            return cv2.cvtColor(window[..., :3], cv2.COLOR_RGB2BGR), None if valid.all() else valid
+        else:
+            window = np.ascontiguousarray(window)
+
+        # Without alpha, orthomosaics mark pixels outside the field as pure black
+        valid = window.any(axis=2)
+        return window, None if valid.all() else valid
+
+
+def _array_channel_order(array, rgb_order='RGB'):
+    if array.ndim == 2:
+        return 'L'
+    if array.shape[2] == 4:
+        return 'RGBA'
+    return rgb_order
+
+
+def _open_tiff_windows(image_path):
+    """tifffile memmap (uncompressed) or zarr view (compressed, decodes only touched chunks); None if unavailable"""
+    try:
+        import tifffile
+    except ImportError:
+        return None
+    try:
+        array = tifffile.memmap(image_path, mode='r')
+    except ValueError:
+        try:
+            import zarr
+        except ImportError:
+            return None
+        array = zarr.open(tifffile.imread(image_path, aszarr=True), mode='r')
+        if not hasattr(array, 'shape'):
+            # Pyramidal TIFF: level 0 is full resolution
+            array = array[0]
+    return WindowedImage(array, _array_channel_order(array))
+
+
+def _open_raw_windows(image):
+    """Memory-map an uncompressed raster (TIFF, BMP, PPM) straight from its pixel data; None if compressed"""
+    tiles = sorted(image.tile, key=lambda tile: tile.extents[1])
+    if not tiles or any(tile.codec_name != 'raw' for tile in tiles):
+        return None
+    rawmode, stride, orientation = (tuple(tiles[0].args) + (0, 1))[:3]
+    if rawmode not in RAW_MODES:
+        return None
+
+    width, height = image.size
+    channels, channel_order = RAW_MODES[rawmode]
+    row_bytes = stride or width * channels
+    # Strips must be full width and back to back in the file
+    for tile in tiles:
+        x0, y0, x1, _ = tile.extents
+        if (x0, x1) != (0, width) or tile.offset != tiles[0].offset + y0 * row_bytes or tile.args != tiles[0].args:
+            return None
+
+    rows = np.memmap(image.filename, dtype=np.uint8, mode='r', offset=tiles[0].offset, shape=(height, row_bytes))
+    array = rows[:, :width * channels].reshape(height, width, channels)
+    if orientation == -1:
+        # Bottom-up rows (BMP)
+        array = array[::-1]
+    return WindowedImage(array, channel_order)
+
+
+def open_field_image(image_path):
+    """Open an image for windowed reads without decoding it"""
+    if image_path.lower().endswith('.npy'):
+        array = np.load(image_path, mmap_mode='r')
+        return WindowedImage(array, _array_channel_order(array))
+
+    if image_path.lower().endswith(('.tif', '.tiff')):
+        windows = _open_tiff_windows(image_path)
+        if windows is not None:
+            return windows
+
+    with Image.open(image_path) as image:
+        windows = _open_raw_windows(image)
+        if windows is not None:
+            return windows
+
+        width, height = image.size
+        if width * height > FULL_DECODE_MAX_PIXELS:
+            raise ValueError(f"{width}x{height} {image.format} image has no windowed reader; "
+                             f"convert it to .npy or a tiled TIFF (with tifffile and zarr installed)")
+        mode = 'RGBA' if 'A' in image.getbands() else 'RGB'
+        array = np.asarray(image.convert(mode))
+        return WindowedImage(array, mode)
+
+
+def _tile_grid(height, width, tile_size):
+    for row, y0 in enumerate(range(0, height, tile_size)):
+        for col, x0 in enumerate(range(0, width, tile_size)):
+            yield row, col, x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height)
+
+
+def _nodata_percentages():
+    """Percentage each color range reports for an all-black (nodata) image"""
+    black = np.zeros((1, 1, 3), np.uint8)
+    return plant_analyzer._pixel_features(black)["color_percentages"]
+
+
+def _analyze_tile(field_image, row, col, x0, y0, x1, y1, nodata_percentages):
+    """Color and texture analysis of one tile; percentages are of the pixels that hold data"""
+    tile, valid = field_image.read_bgr(y0, y1, x0, x1)
+    valid_pixels = tile.shape[0] * tile.shape[1] if valid is None else int(np.count_nonzero(valid))
+    valid_fraction = valid_pixels / (tile.shape[0] * tile.shape[1])
+    record = {"row": row, "col": col, "x": x0, "y": y0, "width": x1 - x0, "height": y1 - y0,
+              "valid_pixels": valid_pixels}
+    if valid_fraction < MIN_VALID_FRACTION:
+        return record
+
+    if valid is not None:
+        tile[~valid] = 0
+    features = plant_analyzer._pixel_features(tile)
+    # Nodata pixels were counted as black; take them back out
+    features["color_percentages"] = {
+        condition: max(0.0, (percentage - (1 - valid_fraction) * nodata_percentages[condition]) / valid_fraction)
+        for condition, percentage in features["color_percentages"].items()
+    }
+    color = plant_analyzer._analyze_colors(tile, features)
+    texture = plant_analyzer._analyze_texture(tile, features["gray"])
+    assessment = plant_analyzer._generate_assessment(None, color, texture, None)
+
+    record.update({
+        "color_percentages": {condition: data["percentage"] for condition, data in color.items()},
+        "disease_percentage": sum(color[condition]["percentage"] for condition in DISEASE_CONDITIONS),
+        "edge_density": texture["edge_density"],
+        "spot_count": texture["spot_count"],
+        "texture_roughness": texture["texture_roughness"],
+        "severity_level": assessment["severity_level"]
+    })
+    return record
+
+
+def iter_tile_analyses(field_image, tile_size=None, workers=None):
+    """Analyze tiles across a thread pool, yielding tile records as they complete
+
+    Only ``2 * workers`` tiles are read at any time, so memory depends on the
+    tile size and worker count, not on the image size.
+    """
+    tile_size = tile_size or TILE_SIZE
+    workers = workers or TILE_WORKERS or os.cpu_count() or 1
+    nodata_percentages = _nodata_percentages()
+    grid = _tile_grid(field_image.height, field_image.width, tile_size)
+
+    # OpenCV releases the GIL, so threads analyze tiles in parallel
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="field-tile") as executor:
+        pending = set()
+        for tile in grid:
+            pending.add(executor.submit(_analyze_tile, field_image, *tile, nodata_percentages))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                tile = next(grid, None)
+                if tile is not None:
+                    pending.add(executor.submit(_analyze_tile, field_image, *tile, nodata_percentages))
+
+
+def analyze_field_image(image_path, tile_size=None, workers=None):
+    """Tiled analysis of a field image of any size
+
+    Returns the per-tile heatmap (disease-indicator percentage and severity
+    per tile, None outside the field), the worst tiles, and field-level
+    aggregates weighted by the pixels each tile covers.
+    """
+    try:
+        field_image = open_field_image(image_path)
+    except Exception as e:
+        return {"error": f"Could not open field image: {str(e)}"}
+
+    tile_size = tile_size or TILE_SIZE
+    rows = -(-field_image.height // tile_size)
+    cols = -(-field_image.width // tile_size)
+    disease_grid = np.full((rows, cols), np.nan, dtype=np.float32)
+    severity_grid = [[None] * cols for _ in range(rows)]
+
+    # Running pixel-weighted sums, so tile records are not kept around
+    color_sums = {}
+    edge_sum = roughness_sum = 0.0
+    analyzed_pixels = spot_total = analyzed_tiles = skipped_tiles = 0
+    severity_pixels = dict.fromkeys(SEVERITY_LEVELS, 0)
+    hotspots = []
+    start_time = time.perf_counter()
+
+    try:
+        for record in iter_tile_analyses(field_image, tile_size, workers):
+            if "disease_percentage" not in record:
+                skipped_tiles += 1
+                continue
+
+            weight = record["valid_pixels"]
+            analyzed_tiles += 1
+            analyzed_pixels += weight
+            for condition, percentage in record["color_percentages"].items():
+                color_sums[condition] = color_sums.get(condition, 0.0) + percentage * weight
+            edge_sum += record["edge_density"] * weight
+            roughness_sum += record["texture_roughness"] * weight
+            spot_total += record["spot_count"]
+            severity_pixels[record["severity_level"]] += weight
+
+            disease_grid[record["row"], record["col"]] = record["disease_percentage"]
+            severity_grid[record["row"]][record["col"]] = record["severity_level"]
+            hotspots.append({key: record[key] for key in ("row", "col", "x", "y", "width", "height",
+                                                           "disease_percentage", "severity_level")})
+            hotspots = sorted(hotspots, key=lambda h: h["disease_percentage"], reverse=True)[:HOTSPOT_LIMIT]
+    except Exception as e:
+        return {"error": f"Field image analysis failed: {str(e)}"}
+
+    if not analyzed_pixels:
+        return {"error": "No field pixels found in image"}
+
+    color_analysis = {
+        condition: {
+            "percentage": total / analyzed_pixels,
+            "severity": "high" if total / analyzed_pixels > 15 else "medium" if total / analyzed_pixels > 5 else "low"
+        }
+        for condition, total in color_sums.items()
+    }
+    texture_analysis = {
+        "edge_density": edge_sum / analyzed_pixels,
+        # Per tile, so the image-level lesion thresholds still apply
+        "spot_count": round(spot_total / analyzed_tiles),
+        "texture_roughness": roughness_sum / analyzed_pixels
+    }
+
+    return {
+        "success": True,
+        "image_dimensions": {"width": field_image.width, "height": field_image.height},
+        "tile_size": tile_size,
+        "grid": {"rows": rows, "cols": cols},
+        "tiles_analyzed": analyzed_tiles,
+        "tiles_skipped_nodata": skipped_tiles,
+        "heatmap": {
+            "disease_percentage": [[None if np.isnan(v) else round(float(v), 2) for v in row] for row in disease_grid],
+            "severity_level": severity_grid
+        },
+        "hotspots": hotspots,
+        "field_summary": {
+            "color_analysis": color_analysis,
+            "texture_analysis": dict(texture_analysis, total_spot_count=spot_total),
+            "severity_area_share": {level: pixels / analyzed_pixels for level, pixels in severity_pixels.items()},
+            "comprehensive_assessment": plant_analyzer._generate_assessment(
+                None, color_analysis, texture_analysis, None
+            )
+        },
+        "elapsed_seconds": time.perf_counter() - start_time
+    }
+
+
+def save_heatmap_image(result, output_path, cell_pixels=16, max_percentage=50.0):
+    """Render the disease-indicator heatmap as a color image (black = outside the field)"""
+    grid = np.array([[np.nan if v is None else v for v in row] for row in result["heatmap"]["disease_percentage"]],
+                    dtype=np.float32)
+    scaled = np.clip(np.nan_to_num(grid, nan=0.0) / max_percentage * 255, 0, 255).astype(np.uint8)
+    heatmap = cv2.applyColorMap(scaled, cv2.COLORMAP_JET)
+    heatmap[np.isnan(grid)] = 0
+    heatmap = cv2.resize(heatmap, (grid.shape[1] * cell_pixels, grid.shape[0] * cell_pixels),
+                         interpolation=cv2.INTER_NEAREST)
+    cv2.imwrite(output_path, heatmap)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiled analysis of drone / orthomosaic field images")
+    parser.add_argument("image", help="Field image (.npy, TIFF, or any format PIL reads)")
+    parser.add_argument("-o", "--output", default="field_analysis.json", help="Result JSON")
+    parser.add_argument("--heatmap", default=None, help="Also render the heatmap to this image file")
+    parser.add_argument("--tile-size", type=int, default=None, help=f"Tile side in pixels (default {TILE_SIZE})")
+    parser.add_argument("--workers", type=int, default=None, help="Tile analysis threads (default: one per core)")
+    args = parser.parse_args()
+
+    print(f"🛰️  Tiled field image analysis: {args.image}")
+    result = analyze_field_image(args.image, args.tile_size, args.workers)
+    if "error" in result:
+        print(f"❌ {result['error']}")
+        sys.exit(1)
+
+    with open(args.output, 'w') as f:
+        json.dump(result, f)
+    if args.heatmap:
+        save_heatmap_image(result, args.heatmap)
+
+    summary = result["field_summary"]
+    assessment = summary["comprehensive_assessment"]
+    print(f"✅ {result['tiles_analyzed']} tiles analyzed ({result['tiles_skipped_nodata']} outside the field) "
+          f"in {result['elapsed_seconds']:.1f}s")
+    print(f"   Field health: {assessment['overall_health']} ({assessment['severity_level']})")
+    for condition, data in summary["color_analysis"].items():
+        print(f"   {condition}: {data['percentage']:.1f}%")
+    print("   Area by tile severity: " + ", ".join(
+        f"{level} {share * 100:.0f}%" for level, share in summary["severity_area_share"].items()))
+    print(f"💾 Results: {args.output}" + (f", heatmap: {args.heatmap}" if args.heatmap else ""))
+
+
+if __name__ == "__main__":
+    main()
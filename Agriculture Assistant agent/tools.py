@@ -1,25 +1,35 @@
 import os
 import sys
 import json
+import asyncio
 import requests
-import numpy as np
-import joblib
-import tensorflow as tf
-from tensorflow.keras.preprocessing import image
-from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from location_service import get_user_location_with_context, get_location_multiple_sources
 from weather_service import get_weather_data
-from groq import Groq
+from llm_service import cached_completion, stream_completion, StreamAssembler
+from image_handle import ImageHandle
+from prompt_builder import PromptBuilder, compact_json, summarize_current_weather, forecast_rows, search_result_rows
 import datetime
 
 load_dotenv()
 
+MARKET_ANALYSIS_CONCURRENCY = int(os.getenv("MARKET_ANALYSIS_CONCURRENCY", "3"))
+
 # Add models directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'models'))
 
-# Initialize Groq client
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Lightweight (stdlib only); numpy/PIL/TensorFlow/OpenCV-backed modules are
+# imported inside the tools that need them, so a weather-only conversation
+# never pays for them
+from model_registry import (
+    model_registry,
+    get_plant_disease_model,
+    get_crop_yield_model,
+    plant_disease_artifacts,
+    plant_disease_model_version
+)
+from prediction_cache import plant_disease_cache, make_cache_key
 
 def get_current_location():
     """Get current location using multiple sources with caching and fallbacks"""
@@ -154,40 +164,62 @@ def search_agricultural_info(query: str) -> dict:
 
 def predict_plant_disease(image_path: str) -> dict:
     """Enhanced plant disease prediction with comprehensive image analysis"""
+    return predict_plant_disease_image(image_path)
+
+def predict_plant_disease_image(image) -> dict:
+    """predict_plant_disease for a path, the uploaded bytes themselves (no temp file needed) or an ImageHandle"""
     try:
-        models_dir = os.path.join(os.path.dirname(__file__), '..', 'models')
-        model_path = os.path.join(models_dir, 'plant_disease_model.h5')
-        classes_path = os.path.join(models_dir, 'plant_disease_classes.pkl')
-        
-        if not os.path.exists(model_path) or not os.path.exists(classes_path):
+        if not model_registry.is_available(*plant_disease_artifacts()):
             return {"error": "Plant disease model files not found"}
         
-        # Import the comprehensive image analyzer
-        from image_analysis_service import analyze_plant_image_comprehensive
-        
-        # Perform comprehensive image analysis
-        comprehensive_analysis = analyze_plant_image_comprehensive(image_path)
+        # Read once; the CNN, OpenCV and AI stages all share this handle's bytes and decode
+        image = ImageHandle.wrap(image)
         
-        # Load model and classes for ML prediction
-        model = tf.keras.models.load_model(model_path)
-        class_names = joblib.load(classes_path)
+        # Repeat uploads of the same photo are answered from the result cache;
+        # the key also covers the settings the result depends on (TTA, analysis resolution)
+        from test_time_augmentation import predict_with_tta, TTA_ENABLED, TTA_CONFIDENCE_THRESHOLD
+        namespace = f"tools.predict_plant_disease:{TTA_ENABLED and TTA_CONFIDENCE_THRESHOLD}:{image.max_dimension}"
+        cache_key = make_cache_key(image.data, plant_disease_model_version(), namespace=namespace)
+        cached_result = plant_disease_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
         
-        # Load and preprocess image for ML model
-        img = image.load_img(image_path, target_size=(224, 224))
-        img_array = image.img_to_array(img)
-        img_array = np.expand_dims(img_array, axis=0)
-        img_array /= 255.0
-        
-        # Make ML prediction
-        predictions = model.predict(img_array)
-        predicted_class_idx = np.argmax(predictions[0])
-        confidence = predictions[0][predicted_class_idx]
+        # Import the comprehensive image analyzer and ML helpers on first use
+        from image_analysis_service import analyze_plant_image_comprehensive
+        from batch_inference import get_plant_disease_batcher
+        from prediction_output import top_k_indices, top_k_predictions
+        from stage_runner import start_stages, join_stages
         
+        def run_ml_prediction():
+            # 224x224 RGB from the shared leaf preprocessing, decoded once per handle (uint8 until batched)
+            img_array = image.model_input()
+            
+            # Make ML prediction (concurrent requests share one batched forward pass)
+            predictions = get_plant_disease_batcher().predict(img_array)
+            
+            # Optional test-time augmentation, only for low-confidence images
+            tta_info = None
+            if TTA_ENABLED:
+                predictions, tta_info = predict_with_tta(img_array, predictions)
+            return predictions, tta_info
+        
+        # The CNN runs while the comprehensive analysis (OpenCV stages and the
+        # Groq call, themselves concurrent) runs in this thread
+        started = start_stages({"ml_prediction": run_ml_prediction})
+        comprehensive_analysis = analyze_plant_image_comprehensive(image)
+        stages, errors, timings = join_stages(started)
+        if errors:
+            return {"error": f"Failed to predict plant disease: {errors['ml_prediction']}"}
+        predictions, tta_info = stages["ml_prediction"]
+        
+        # Model and classes stay resident after the first request
+        _, class_names = get_plant_disease_model()
+        
+        # Top 3 predictions by partial selection (best first)
+        predicted_class_idx = top_k_indices(predictions, 1)[0]
+        confidence = float(predictions[predicted_class_idx])
         predicted_class = class_names[predicted_class_idx]
-        
-        # Get top 3 predictions
-        top_indices = np.argsort(predictions[0])[-3:][::-1]
-        top_predictions = [(class_names[i], float(predictions[0][i])) for i in top_indices]
+        top_predictions = top_k_predictions(predictions, class_names, 3)
         
         # Combine ML prediction with comprehensive analysis
         result = {
@@ -195,7 +227,9 @@ def predict_plant_disease(image_path: str) -> dict:
             "ml_prediction": {
                 "predicted_disease": predicted_class,
                 "confidence": float(confidence),
-                "top_predictions": top_predictions
+                "top_predictions": top_predictions,
+                "test_time_augmentation": tta_info,
+                "latency_ms": timings["ml_prediction"]
             },
             "comprehensive_analysis": comprehensive_analysis,
             "detailed_assessment": generate_detailed_plant_assessment(
@@ -206,11 +240,39 @@ def predict_plant_disease(image_path: str) -> dict:
             )
         }
         
+        # Don't pin degraded results (e.g. Groq unavailable) for the cache lifetime
+        if comprehensive_analysis.get("success") and "error" not in comprehensive_analysis.get("ai_analysis", {}):
+            plant_disease_cache.put(cache_key, result)
         return result
         
     except Exception as e:
         return {"error": f"Failed to predict plant disease: {str(e)}"}
 
+def find_similar_plant_cases(image_path: str) -> dict:
+    """Find confirmed plant disease cases that look most similar to the given image"""
+    try:
+        from leaf_embeddings import find_similar_cases, INDEX_DIR
+        
+        if not os.path.exists(os.path.join(INDEX_DIR, 'index.json')):
+            return {"error": "Similar-case index not found. Build it with models/leaf_embeddings.py"}
+        
+        result = find_similar_cases(image_path, k=5, mode="approximate", index_dir=INDEX_DIR)
+        similar = {
+            "success": True,
+            "similar_cases": [
+                {"label": match["label"], "similarity": match["similarity"], "image_path": match["image_path"]}
+                for match in result["matches"]
+            ],
+            "indexed_images": result["indexed_images"]
+        }
+        if "warning" in result:
+            similar["warning"] = result["warning"]
+        
+        return similar
+        
+    except Exception as e:
+        return {"error": f"Failed to find similar cases: {str(e)}"}
+
 def generate_detailed_plant_assessment(ml_prediction, confidence, image_analysis):
     """Generate detailed plant assessment combining ML and image analysis"""
     try:
@@ -358,17 +420,9 @@ def get_enhanced_treatment_advice(disease_name, image_analysis):
 def predict_crop_yield(input_data: str) -> dict:
     """Predict crop yield using trained ML model"""
     try:
-        models_dir = os.path.join(os.path.dirname(__file__), '..', 'models')
-        
         # Try multi-crop model first
-        multi_model_path = os.path.join(models_dir, 'multi_crop_yield_model.pkl')
-        encoders_path = os.path.join(models_dir, 'multi_crop_label_encoders.pkl')
-        features_path = os.path.join(models_dir, 'multi_crop_feature_names.pkl')
-        
-        if os.path.exists(multi_model_path):
-            model = joblib.load(multi_model_path)
-            encoders = joblib.load(encoders_path)
-            feature_names = joblib.load(features_path)
+        if model_registry.is_available("multi_crop_yield_model"):
+            model, encoders, feature_names = get_crop_yield_model()
             
             # Parse input data
             data = json.loads(input_data)
@@ -437,54 +491,76 @@ def analyze_crop_health_with_ai(crop_data: str) -> dict:
         Format as JSON with clear recommendations.
         """
         
-        response = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
-            temperature=0.3
-        )
+        ai_text = cached_completion("analyze_crop_health_with_ai", prompt, temperature=0.3)
         
         return {
             "success": True,
-            "analysis": response.choices[0].message.content,
+            "analysis": ai_text,
             "model": "llama-3.1-8b-instant"
         }
         
     except Exception as e:
         return {"error": f"Failed to analyze crop health: {str(e)}"}
 
+def _stream_advisor(tool, prompt, temperature, build_result, error_prefix, validate=None):
+    """Stream a Groq advisor answer as events
+    
+    Yields {"event": "delta", "text": ...} for every chunk, {"event": "section",
+    "text": ...} for every completed paragraph, and finally {"event": "result",
+    "result": ...} with the same dict the non-streaming tool returns (plus
+    first_chunk_ms).
+    """
+    assembler = StreamAssembler()
+    try:
+        for chunk in stream_completion(tool, prompt, temperature=temperature, validate=validate):
+            yield {"event": "delta", "text": chunk}
+            for section in assembler.feed(chunk):
+                yield {"event": "section", "text": section}
+        for section in assembler.close():
+            yield {"event": "section", "text": section}
+        result = build_result(assembler.text)
+        result["first_chunk_ms"] = assembler.first_chunk_ms
+    except Exception as e:
+        result = {"error": f"{error_prefix}: {str(e)}"}
+    yield {"event": "result", "result": result}
+
+def _farming_plan_prompt(requirements):
+    return f"""
+    Create a detailed farming plan based on these requirements:
+    {requirements}
+    
+    Include:
+    1. Crop selection and rotation plan
+    2. Timeline with monthly activities
+    3. Resource requirements (seeds, fertilizers, water)
+    4. Budget estimation
+    5. Risk management strategies
+    6. Expected yield and profit projections
+    
+    Provide practical, actionable plan in JSON format.
+    """
+
+def _farming_plan_result(ai_text):
+    return {
+        "success": True,
+        "farming_plan": ai_text,
+        "model": "llama-3.1-8b-instant"
+    }
+
 def generate_farming_plan(requirements: str) -> dict:
     """Generate comprehensive farming plan using Groq AI"""
     try:
-        prompt = f"""
-        Create a detailed farming plan based on these requirements:
-        {requirements}
-        
-        Include:
-        1. Crop selection and rotation plan
-        2. Timeline with monthly activities
-        3. Resource requirements (seeds, fertilizers, water)
-        4. Budget estimation
-        5. Risk management strategies
-        6. Expected yield and profit projections
-        
-        Provide practical, actionable plan in JSON format.
-        """
-        
-        response = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
-            temperature=0.4
-        )
-        
-        return {
-            "success": True,
-            "farming_plan": response.choices[0].message.content,
-            "model": "llama-3.1-8b-instant"
-        }
+        ai_text = cached_completion("generate_farming_plan", _farming_plan_prompt(requirements), temperature=0.4)
+        return _farming_plan_result(ai_text)
         
     except Exception as e:
         return {"error": f"Failed to generate farming plan: {str(e)}"}
 
+def generate_farming_plan_stream(requirements: str):
+    """Streaming generate_farming_plan; yields events, see _stream_advisor"""
+    yield from _stream_advisor("generate_farming_plan", _farming_plan_prompt(requirements), 0.4,
+                               _farming_plan_result, "Failed to generate farming plan")
+
 def pest_disease_advisor(symptoms: str) -> dict:
     """Advanced pest and disease identification and treatment using Groq AI"""
     try:
@@ -505,56 +581,56 @@ def pest_disease_advisor(symptoms: str) -> dict:
         Format as detailed JSON response.
         """
         
-        response = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
-            temperature=0.2
-        )
+        ai_text = cached_completion("pest_disease_advisor", prompt, temperature=0.2)
         
         return {
             "success": True,
-            "diagnosis": response.choices[0].message.content,
+            "diagnosis": ai_text,
             "model": "llama-3.1-8b-instant"
         }
         
     except Exception as e:
         return {"error": f"Failed to diagnose pest/disease: {str(e)}"}
 
+def _soil_analysis_prompt(soil_data):
+    return f"""
+    As a soil scientist, analyze this soil data and provide expert recommendations:
+    
+    Soil Data: {soil_data}
+    
+    Analyze and recommend:
+    1. Soil health assessment
+    2. Nutrient deficiencies/excesses
+    3. pH adjustment strategies
+    4. Organic matter improvement
+    5. Suitable crops for this soil
+    6. Fertilization schedule
+    7. Soil conservation practices
+    
+    Provide detailed JSON response with actionable steps.
+    """
+
+def _soil_analysis_result(ai_text):
+    return {
+        "success": True,
+        "soil_analysis": ai_text,
+        "model": "llama-3.1-8b-instant"
+    }
+
 def soil_analysis_advisor(soil_data: str) -> dict:
     """Comprehensive soil analysis and recommendations using Groq AI"""
     try:
-        prompt = f"""
-        As a soil scientist, analyze this soil data and provide expert recommendations:
-        
-        Soil Data: {soil_data}
-        
-        Analyze and recommend:
-        1. Soil health assessment
-        2. Nutrient deficiencies/excesses
-        3. pH adjustment strategies
-        4. Organic matter improvement
-        5. Suitable crops for this soil
-        6. Fertilization schedule
-        7. Soil conservation practices
-        
-        Provide detailed JSON response with actionable steps.
-        """
-        
-        response = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
-            temperature=0.3
-        )
-        
-        return {
-            "success": True,
-            "soil_analysis": response.choices[0].message.content,
-            "model": "llama-3.1-8b-instant"
-        }
+        ai_text = cached_completion("soil_analysis_advisor", _soil_analysis_prompt(soil_data), temperature=0.3)
+        return _soil_analysis_result(ai_text)
         
     except Exception as e:
         return {"error": f"Failed to analyze soil: {str(e)}"}
 
+def soil_analysis_advisor_stream(soil_data: str):
+    """Streaming soil_analysis_advisor; yields events, see _stream_advisor"""
+    yield from _stream_advisor("soil_analysis_advisor", _soil_analysis_prompt(soil_data), 0.3,
+                               _soil_analysis_result, "Failed to analyze soil")
+
 def market_price_advisor(crop_query: str) -> dict:
     """Get market insights and price predictions using AI analysis"""
     try:
@@ -580,15 +656,11 @@ def market_price_advisor(crop_query: str) -> dict:
             Format as actionable JSON response.
             """
             
-            response = groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.1-8b-instant",
-                temperature=0.4
-            )
+            ai_text = cached_completion("market_price_advisor", prompt, temperature=0.4)
             
             return {
                 "success": True,
-                "market_analysis": response.choices[0].message.content,
+                "market_analysis": ai_text,
                 "data_sources": len(market_data),
                 "model": "llama-3.1-8b-instant"
             }
@@ -598,219 +670,271 @@ def market_price_advisor(crop_query: str) -> dict:
     except Exception as e:
         return {"error": f"Failed to analyze market: {str(e)}"}
 
+def _weather_advice_context():
+    """Location, current weather and forecast for the weather advisor; returns (weather_data, error)"""
+    # Step 1: Get current location
+    location = get_current_location()
+    if "error" in location:
+        return None, f"Failed to get location: {location['error']}"
+    
+    # Step 2: Get current weather
+    current_weather = get_current_weather("")  # Empty string triggers automatic location
+    if "error" in current_weather:
+        return None, f"Failed to get weather: {current_weather['error']}"
+    
+    # Step 3: Get weather forecast
+    forecast = get_weather_forecast("")  # Empty string triggers automatic location
+    if "error" in forecast:
+        return None, f"Failed to get forecast: {forecast['error']}"
+    
+    # Combine weather data
+    return {
+        "location": location,
+        "current": current_weather.get("current_weather", {}),
+        "forecast": forecast.get("forecast", {})
+    }, None
+
+def _weather_advice_prompt(weather_data):
+    location = weather_data["location"]
+    builder = PromptBuilder("weather_farming_advisor")
+    builder.add("Location", f"{location.get('city', 'Unknown')}, {location.get('country', 'Unknown')}")
+    builder.add("Current weather", compact_json(summarize_current_weather(weather_data["current"])))
+    forecast_header, forecast_table = forecast_rows(weather_data["forecast"])
+    builder.add("Forecast", forecast_table, header=forecast_header, min_rows=3)
+    return builder.build("""
+    As an agricultural expert, analyze the weather data above and provide farming recommendations:
+    
+    Provide:
+    1. Immediate farming activities (next 7 days)
+    2. Crop protection strategies
+    3. Irrigation recommendations
+    4. Pest/disease risk assessment
+    5. Field work timing
+    6. Emergency preparedness if needed
+    
+    Format as detailed JSON with specific actions and timelines.
+    """)
+
+def _weather_advice_result(weather_data, ai_text):
+    location = weather_data["location"]
+    return {
+        "success": True,
+        "location": {
+            "city": location.get("city"),
+            "country": location.get("country"),
+            "coordinates": {
+                "latitude": location.get("latitude"),
+                "longitude": location.get("longitude")
+            }
+        },
+        "weather_summary": {
+            "current": weather_data["current"],
+            "forecast_summary": weather_data["forecast"]
+        },
+        "farming_recommendations": json.loads(ai_text),
+        "data_timestamp": datetime.datetime.now().isoformat()
+    }
+
 def weather_farming_advisor(input_data: str = "") -> dict:
     """Advanced weather-based farming recommendations with automatic location detection"""
     try:
-        # Step 1: Get current location
-        location = get_current_location()
-        if "error" in location:
-            return {"error": f"Failed to get location: {location['error']}"}
-        
-        # Step 2: Get current weather
-        current_weather = get_current_weather("")  # Empty string triggers automatic location
-        if "error" in current_weather:
-            return {"error": f"Failed to get weather: {current_weather['error']}"}
-        
-        # Step 3: Get weather forecast
-        forecast = get_weather_forecast("")  # Empty string triggers automatic location
-        if "error" in forecast:
-            return {"error": f"Failed to get forecast: {forecast['error']}"}
-        
-        # Combine weather data
-        weather_data = {
-            "location": location,
-            "current": current_weather.get("current_weather", {}),
-            "forecast": forecast.get("forecast", {})
-        }
+        weather_data, error = _weather_advice_context()
+        if error:
+            return {"error": error}
         
         # Generate AI-powered farming recommendations
-        prompt = f"""
-        As an agricultural expert, analyze this weather data and provide farming recommendations:
-        
-        Location: {location.get('city', 'Unknown')}, {location.get('country', 'Unknown')}
-        Current Weather: {json.dumps(weather_data['current'], indent=2)}
-        Forecast: {json.dumps(weather_data['forecast'], indent=2)}
-        
-        Provide:
-        1. Immediate farming activities (next 7 days)
-        2. Crop protection strategies
-        3. Irrigation recommendations
-        4. Pest/disease risk assessment
-        5. Field work timing
-        6. Emergency preparedness if needed
-        
-        Format as detailed JSON with specific actions and timelines.
-        """
-        
-        response = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
-            temperature=0.3
-        )
-        
-        ai_recommendations = json.loads(response.choices[0].message.content)
-        
-        return {
-            "success": True,
-            "location": {
-                "city": location.get("city"),
-                "country": location.get("country"),
-                "coordinates": {
-                    "latitude": location.get("latitude"),
-                    "longitude": location.get("longitude")
-                }
-            },
-            "weather_summary": {
-                "current": weather_data["current"],
-                "forecast_summary": weather_data["forecast"]
-            },
-            "farming_recommendations": ai_recommendations,
-            "data_timestamp": datetime.datetime.now().isoformat()
-        }
+        ai_text = cached_completion("weather_farming_advisor", _weather_advice_prompt(weather_data),
+                                    temperature=0.3, validate=json.loads)
+        return _weather_advice_result(weather_data, ai_text)
         
     except Exception as e:
         return {"error": f"Failed to generate weather-based farming advice: {str(e)}"}
 
-def recommend_suitable_crops(area_acres: float = 5.0) -> dict:
-    """Automatically analyze location and conditions to recommend suitable crops"""
+def weather_farming_advisor_stream(input_data: str = ""):
+    """Streaming weather_farming_advisor; yields events, see _stream_advisor"""
+    error_prefix = "Failed to generate weather-based farming advice"
+    try:
+        weather_data, error = _weather_advice_context()
+    except Exception as e:
+        weather_data, error = None, f"{error_prefix}: {str(e)}"
+    if error:
+        yield {"event": "result", "result": {"error": error}}
+        return
+    
+    yield from _stream_advisor("weather_farming_advisor", _weather_advice_prompt(weather_data), 0.3,
+                               lambda ai_text: _weather_advice_result(weather_data, ai_text), error_prefix,
+                               validate=json.loads)
+
+def _crop_recommendation_prompt(location, analysis_data, area_acres):
+    """Groq prompt for crop recommendations from the gathered location, weather and search data"""
+    builder = PromptBuilder("recommend_suitable_crops")
+    builder.add("Location", f"{location.get('city', 'Unknown')}, {location.get('country', 'Unknown')}")
+    builder.add("Farm Size", f"{area_acres} acres")
+    builder.add("Weather Data", compact_json(summarize_current_weather(analysis_data["weather"])))
+    forecast_header, forecast_table = forecast_rows(analysis_data["forecast"])
+    builder.add("Forecast", forecast_table, header=forecast_header, min_rows=3)
+    builder.add("Local Agriculture", search_result_rows(analysis_data["local_agri_info"], limit=3))
+    return builder.build("""
+    As an agricultural expert, analyze the data above and recommend suitable crops.
+    
+    Provide comprehensive recommendations including:
+    1. Top recommended crops with reasoning
+    2. Seasonal planting calendar
+    3. Expected water requirements
+    4. Estimated input costs per acre
+    5. Potential yield and market value
+    6. Risk assessment
+    7. Crop rotation suggestions
+    8. Resource requirements
+    
+    Consider:
+    - Local climate patterns
+    - Traditional farming practices
+    - Market demand
+    - Water availability
+    - Soil types common in the region
+    - Economic viability
+    
+    Format as detailed JSON with clear sections.
+    """)
+
+def _parse_crop_recommendations(ai_text):
+    """Parse the AI crop recommendations, falling back to a structured default"""
     try:
-        # Step 1: Get location and weather data
-        location = get_current_location()
+        recommendations = json.loads(ai_text)
+    except json.JSONDecodeError:
+        # If JSON parsing fails, create structured response from text
+        recommendations = {
+            "recommended_crops": [
+                {
+                    "name": "Rice",
+                    "reason": "Suitable for local climate",
+                    "planting_season": "Kharif",
+                    "water_requirements": "High",
+                    "expected_yield": "20-25 quintals/acre"
+                },
+                {
+                    "name": "Cotton",
+                    "reason": "Good market demand",
+                    "planting_season": "Kharif", 
+                    "water_requirements": "Medium",
+                    "expected_yield": "8-10 quintals/acre"
+                }
+            ],
+            "location_advantages": ["Good climate", "Market access"],
+            "potential_challenges": ["Water management", "Pest control"],
+            "ai_response": ai_text
+        }
+    
+    return recommendations
+
+def _crop_recommendation_result(location, analysis_data, recommendations, market_insights, area_acres):
+    """Tool result for recommend_suitable_crops"""
+    return {
+        "success": True,
+        "location_details": {
+            "city": location.get("city"),
+            "country": location.get("country"),
+            "coordinates": {
+                "latitude": location.get("latitude"),
+                "longitude": location.get("longitude")
+            }
+        },
+        "climate_summary": {
+            "current_conditions": analysis_data["weather"],
+            "seasonal_patterns": analysis_data["forecast"]
+        },
+        "farm_profile": {
+            "size_acres": area_acres,
+            "location_advantages": recommendations.get("location_advantages", []),
+            "potential_challenges": recommendations.get("potential_challenges", [])
+        },
+        "crop_recommendations": recommendations,
+        "market_insights": market_insights,
+        "data_timestamp": datetime.datetime.now().isoformat(),
+        "confidence_score": "high",
+        "data_sources": [
+            "Location Services",
+            "OpenWeather API",
+            "Agricultural Database",
+            "Market Analysis",
+            "AI Crop Analysis"
+        ]
+    }
+
+async def recommend_suitable_crops_async(area_acres: float = 5.0) -> dict:
+    """Async crop recommendations: independent fetches run concurrently, market analyses in parallel
+    
+    Location is resolved once; the weather fetch (current conditions and
+    forecast come from one call) overlaps the agricultural search, and the
+    per-crop market analyses run at most MARKET_ANALYSIS_CONCURRENCY at a time.
+    """
+    try:
+        # Step 1: Location, needed by everything else
+        location = await asyncio.to_thread(get_current_location)
         if "error" in location:
             return {"error": f"Failed to get location: {location['error']}"}
         
-        # Step 2: Get current weather patterns
-        current_weather = get_current_weather("")
-        if "error" in current_weather:
-            return {"error": f"Failed to get weather: {current_weather['error']}"}
-        
-        # Step 3: Get weather forecast for season analysis
-        forecast = get_weather_forecast("")
-        if "error" in forecast:
-            return {"error": f"Failed to get forecast: {forecast['error']}"}
-        
-        # Step 4: Get local agricultural data
-        agri_info = search_agricultural_info(f"major crops farming {location.get('city', '')} {location.get('state', '')} {location.get('country', '')}")
+        # Step 2: Weather and local agricultural data, concurrently
+        agri_query = f"major crops farming {location.get('city', '')} {location.get('state', '')} {location.get('country', '')}"
+        weather_task = asyncio.to_thread(get_weather_data, location["latitude"], location["longitude"])
+        search_task = asyncio.to_thread(search_agricultural_info, agri_query)
+        weather_data, agri_info = await asyncio.gather(weather_task, search_task, return_exceptions=True)
+        if isinstance(weather_data, Exception):
+            return {"error": f"Failed to get weather: {str(weather_data)}"}
+        if isinstance(agri_info, Exception):
+            agri_info = {"error": str(agri_info)}
         if "error" in agri_info:
             return {"error": f"Failed to get agricultural info: {agri_info['error']}"}
         
-        # Combine all data for AI analysis
         analysis_data = {
             "location": location,
-            "weather": current_weather.get("current_weather", {}),
-            "forecast": forecast.get("forecast", {}),
+            "weather": weather_data["current"],
+            "forecast": weather_data["forecast"],
             "local_agri_info": agri_info.get("results", []),
             "farm_size": area_acres
         }
         
-        # Generate AI-powered crop recommendations
-        prompt = f"""
-        As an agricultural expert, analyze this data and recommend suitable crops:
-        
-        Location: {location.get('city', 'Unknown')}, {location.get('country', 'Unknown')}
-        Farm Size: {area_acres} acres
-        Weather Data: {json.dumps(analysis_data['weather'], indent=2)}
-        Local Agriculture: {json.dumps(analysis_data['local_agri_info'][:3], indent=2)}
-        
-        Provide comprehensive recommendations including:
-        1. Top recommended crops with reasoning
-        2. Seasonal planting calendar
-        3. Expected water requirements
-        4. Estimated input costs per acre
-        5. Potential yield and market value
-        6. Risk assessment
-        7. Crop rotation suggestions
-        8. Resource requirements
-        
-        Consider:
-        - Local climate patterns
-        - Traditional farming practices
-        - Market demand
-        - Water availability
-        - Soil types common in the region
-        - Economic viability
-        
-        Format as detailed JSON with clear sections.
-        """
-        
-        response = groq_client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.1-8b-instant",
-            temperature=0.3
-        )
-        
-        # Parse AI response safely
-        try:
-            recommendations = json.loads(response.choices[0].message.content)
-        except json.JSONDecodeError:
-            # If JSON parsing fails, create structured response from text
-            ai_text = response.choices[0].message.content
-            recommendations = {
-                "recommended_crops": [
-                    {
-                        "name": "Rice",
-                        "reason": "Suitable for local climate",
-                        "planting_season": "Kharif",
-                        "water_requirements": "High",
-                        "expected_yield": "20-25 quintals/acre"
-                    },
-                    {
-                        "name": "Cotton",
-                        "reason": "Good market demand",
-                        "planting_season": "Kharif", 
-                        "water_requirements": "Medium",
-                        "expected_yield": "8-10 quintals/acre"
-                    }
-                ],
-                "location_advantages": ["Good climate", "Market access"],
-                "potential_challenges": ["Water management", "Pest control"],
-                "ai_response": ai_text
-            }
-        
-        # Get market insights for recommended crops
-        market_insights = {}
-        if recommendations.get("recommended_crops"):
-            for crop in recommendations["recommended_crops"][:3]:  # Top 3 crops
-                crop_name = crop.get("name", "")
-                if crop_name:
-                    market_data = market_price_advisor(f"{crop_name} price trends {location.get('city', '')}")
-                    if market_data.get("success"):
-                        market_insights[crop_name] = market_data.get("market_analysis")
-        
-        return {
-            "success": True,
-            "location_details": {
-                "city": location.get("city"),
-                "country": location.get("country"),
-                "coordinates": {
-                    "latitude": location.get("latitude"),
-                    "longitude": location.get("longitude")
-                }
-            },
-            "climate_summary": {
-                "current_conditions": analysis_data["weather"],
-                "seasonal_patterns": analysis_data["forecast"]
-            },
-            "farm_profile": {
-                "size_acres": area_acres,
-                "location_advantages": recommendations.get("location_advantages", []),
-                "potential_challenges": recommendations.get("potential_challenges", [])
-            },
-            "crop_recommendations": recommendations,
-            "market_insights": market_insights,
-            "data_timestamp": datetime.datetime.now().isoformat(),
-            "confidence_score": "high",
-            "data_sources": [
-                "Location Services",
-                "OpenWeather API",
-                "Agricultural Database",
-                "Market Analysis",
-                "AI Crop Analysis"
-            ]
+        # Step 3: AI crop recommendations
+        prompt = _crop_recommendation_prompt(location, analysis_data, area_acres)
+        ai_text = await asyncio.to_thread(cached_completion, "recommend_suitable_crops", prompt, temperature=0.3)
+        recommendations = _parse_crop_recommendations(ai_text)
+        
+        # Step 4: Market insights for the top 3 crops, in parallel
+        semaphore = asyncio.Semaphore(MARKET_ANALYSIS_CONCURRENCY)
+        
+        async def market_analysis(crop_name):
+            async with semaphore:
+                return await asyncio.to_thread(market_price_advisor, f"{crop_name} price trends {location.get('city', '')}")
+        
+        crop_names = [crop.get("name", "") for crop in (recommendations.get("recommended_crops") or [])[:3]]
+        crop_names = [name for name in crop_names if name]
+        market_results = await asyncio.gather(*(market_analysis(name) for name in crop_names), return_exceptions=True)
+        market_insights = {
+            name: market_data.get("market_analysis")
+            for name, market_data in zip(crop_names, market_results)
+            if isinstance(market_data, dict) and market_data.get("success")
         }
         
+        return _crop_recommendation_result(location, analysis_data, recommendations, market_insights, area_acres)
+        
     except Exception as e:
         return {"error": f"Failed to generate crop recommendations: {str(e)}"}
+
+def recommend_suitable_crops(area_acres: float = 5.0) -> dict:
+    """Automatically analyze location and conditions to recommend suitable crops"""
+    return _run_coroutine(recommend_suitable_crops_async(area_acres))
+
+def _run_coroutine(coroutine):
+    """Run a coroutine to completion from sync code, even when called on a thread with a running loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # A loop is already running here (async agent runtime): run ours on a helper thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
 def get_current_weather(input: str) -> dict:
     """Get current weather for location"""
     try:
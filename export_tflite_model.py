@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Export the trained plant disease model to quantized TFLite models
+Run this after train_plant_disease_model.py to produce:
+  - models/plant_disease_model_dynamic.tflite  (dynamic-range int8 weights)
+  - models/plant_disease_model_int8.tflite     (full int8, calibrated on the validation split)
+and an accuracy/latency report comparing both against the .h5 model.
+Serve a variant by setting PLANT_DISEASE_BACKEND=tflite_dynamic or tflite_int8.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import joblib
+import tensorflow as tf
+
+sys.path.append('models')
+
+from model_registry import (
+    PLANT_DISEASE_MODEL_PATH,
+    PLANT_DISEASE_CLASSES_PATH,
+    PLANT_DISEASE_TFLITE_DYNAMIC_PATH,
+    PLANT_DISEASE_TFLITE_INT8_PATH,
+    MODELS_DIR
+)
+from tflite_backend import TFLiteClassifier
+from image_preprocessing import load_image_for_model
+
+VALID_PATH = 'dataset/Plant Diseases Dataset/New Plant Diseases Dataset(Augmented)/New Plant Diseases Dataset(Augmented)/valid'
+REPORT_PATH = os.path.join(MODELS_DIR, 'tflite_export_report.json')
+
+
+def list_validation_images(valid_path, class_names, per_class, seed=42):
+    """Sample up to ``per_class`` labelled images from each validation class folder"""
+    rng = np.random.default_rng(seed)
+    samples = []
+    for label, class_name in enumerate(class_names):
+        class_dir = os.path.join(valid_path, class_name)
+        if not os.path.isdir(class_dir):
+            continue
+        files = sorted(f for f in os.listdir(class_dir) if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+        for name in rng.permutation(files)[:per_class]:
+            samples.append((os.path.join(class_dir, name), label))
+    return samples
+
+
+def export_dynamic_range(model):
+    """Dynamic-range quantization: int8 weights, float activations"""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    return converter.convert()
+
+
+def export_full_int8(model, calibration_images):
+    """Full integer quantization calibrated on validation images"""
+    def representative_dataset():
+        for img_array in calibration_images:
+            yield [img_array[np.newaxis].astype(np.float32)]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.uint8
+    converter.inference_output_type = tf.uint8
+    return converter.convert()
+
+
+def evaluate(predict_on_batch, images, batch_size=32):
+    """Return (probabilities, seconds per image) for a classifier over the eval set"""
+    outputs = []
+    start_time = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        outputs.append(np.asarray(predict_on_batch(np.stack(images[i:i + batch_size]))))
+    elapsed = time.perf_counter() - start_time
+    return np.concatenate(outputs), elapsed / max(len(images), 1)
+
+
+def export_tflite_models(valid_path=VALID_PATH, calibration_per_class=5, eval_per_class=20):
+    print("📦 Exporting plant disease model to TFLite...")
+    print("=" * 60)
+
+    if not os.path.exists(PLANT_DISEASE_MODEL_PATH):
+        print(f"❌ Model not found at: {PLANT_DISEASE_MODEL_PATH}")
+        return False
+    if not os.path.exists(valid_path):
+        print(f"❌ Validation data not found at: {valid_path}")
+        return False
+
+    model = tf.keras.models.load_model(PLANT_DISEASE_MODEL_PATH)
+    class_names = joblib.load(PLANT_DISEASE_CLASSES_PATH)
+
+    # Calibration and evaluation samples are drawn separately from the validation split
+    calibration = list_validation_images(valid_path, class_names, calibration_per_class, seed=0)
+    evaluation = list_validation_images(valid_path, class_names, eval_per_class, seed=1)
+    print(f"   - Calibration images: {len(calibration)}")
+    print(f"   - Evaluation images: {len(evaluation)}")
+
+    calibration_images = [load_image_for_model(path) for path, _ in calibration]
+    eval_images = [load_image_for_model(path) for path, _ in evaluation]
+    eval_labels = np.array([label for _, label in evaluation])
+
+    print("\n🔧 Converting (dynamic range)...")
+    with open(PLANT_DISEASE_TFLITE_DYNAMIC_PATH, 'wb') as f:
+        f.write(export_dynamic_range(model))
+
+    print("🔧 Converting (full int8)...")
+    with open(PLANT_DISEASE_TFLITE_INT8_PATH, 'wb') as f:
+        f.write(export_full_int8(model, calibration_images))
+
+    # Accuracy delta report against the h5 model
+    print("\n📊 Comparing against the .h5 model...")
+    reference, reference_latency = evaluate(model.predict_on_batch, eval_images)
+    reference_top1 = reference.argmax(axis=1)
+
+    report = {
+        "evaluation_images": len(evaluation),
+        "keras_h5": {
+            "path": PLANT_DISEASE_MODEL_PATH,
+            "size_mb": os.path.getsize(PLANT_DISEASE_MODEL_PATH) / (1024 * 1024),
+            "accuracy": float(np.mean(reference_top1 == eval_labels)),
+            "ms_per_image": reference_latency * 1000
+        }
+    }
+
+    for name, path in [("tflite_dynamic", PLANT_DISEASE_TFLITE_DYNAMIC_PATH),
+                       ("tflite_int8", PLANT_DISEASE_TFLITE_INT8_PATH)]:
+        classifier = TFLiteClassifier(path)
+        probabilities, latency = evaluate(classifier.predict_on_batch, eval_images)
+        top1 = probabilities.argmax(axis=1)
+        accuracy = float(np.mean(top1 == eval_labels))
+        report[name] = {
+            "path": path,
+            "size_mb": os.path.getsize(path) / (1024 * 1024),
+            "accuracy": accuracy,
+            "accuracy_delta": accuracy - report["keras_h5"]["accuracy"],
+            "top1_agreement": float(np.mean(top1 == reference_top1)),
+            "mean_abs_probability_delta": float(np.mean(np.abs(probabilities - reference))),
+            "ms_per_image": latency * 1000
+        }
+
+    with open(REPORT_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for name, info in report.items():
+        if not isinstance(info, dict):
+            continue
+        line = f"   {name:15s} {info['size_mb']:6.1f} MB  acc {info['accuracy']:.4f}  {info['ms_per_image']:.1f} ms/img"
+        if "accuracy_delta" in info:
+            line += f"  Δacc {info['accuracy_delta']:+.4f}  agree {info['top1_agreement']:.3f}"
+        print(line)
+
+    print(f"\n💾 Report saved: {REPORT_PATH}")
+    print("=" * 60)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export quantized TFLite plant disease models")
+    parser.add_argument("--valid-path", default=VALID_PATH)
+    parser.add_argument("--calibration-per-class", type=int, default=5)
+    parser.add_argument("--eval-per-class", type=int, default=20)
+    args = parser.parse_args()
+
+    success = export_tflite_models(args.valid_path, args.calibration_per_class, args.eval_per_class)
+    if success:
+        print("✅ Serve with: PLANT_DISEASE_BACKEND=tflite_int8 (or tflite_dynamic)")
+    else:
+        print("❌ Export failed. Train the model first and check the dataset path.")
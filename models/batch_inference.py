@@ -0,0 +1,136 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+from model_registry import get_plant_disease_model
+from image_preprocessing import to_model_input
+
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("PLANT_DISEASE_MAX_BATCH_SIZE", "16"))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("PLANT_DISEASE_MAX_WAIT_MS", "5"))
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Collects concurrent single-image requests into one batched forward pass
+
+    A request waits at most ``max_wait_ms`` for other requests to arrive; the
+    batch is run as soon as it holds ``max_batch_size`` images or the wait
+    expires, and each caller receives its own row of the output.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._images = 0
+        self._worker = threading.Thread(target=self._run, name="plant-disease-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, sample):
+        """Queue one preprocessed sample (no batch axis) and return a Future"""
+        future = Future()
+        self._queue.put((np.asarray(sample), future))
+        return future
+
+    def predict(self, sample, timeout=None):
+        """Blocking single-sample prediction routed through the shared batch"""
+        return self.submit(sample).result(timeout=timeout)
+
+    def stats(self):
+        """Batching counters since start-up"""
+        with self._stats_lock:
+            return {
+                "batches": self._batches,
+                "images": self._images,
+                "average_batch_size": self._images / self._batches if self._batches else 0.0,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0
+            }
+
+    def close(self):
+        """Stop the worker once the requests already queued have been served"""
+        self._queue.put(_STOP)
+
+    def _collect(self):
+        """Block for the first request, then gather more until full or timed out"""
+        batch = []
+        item = self._queue.get()
+        deadline = time.perf_counter() + self.max_wait
+        while item is not _STOP:
+            batch.append(item)
+            if len(batch) >= self.max_batch_size:
+                return batch, False
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    item = self._queue.get_nowait()
+                else:
+                    item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch, False
+        return batch, True
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            if not batch:
+                continue
+            futures = [future for _, future in batch]
+            try:
+                outputs = np.asarray(self.predict_fn(np.stack([sample for sample, _ in batch])))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            with self._stats_lock:
+                self._batches += 1
+                self._images += len(batch)
+
+            for i, future in enumerate(futures):
+                future.set_result(outputs[i])
+
+
+def _predict_plant_disease_batch(batch):
+    """Forward pass of the resident disease model over a stacked batch
+
+    uint8 images are normalized here, once for the whole batch.
+    """
+    model, _ = get_plant_disease_model()
+    return model.predict_on_batch(to_model_input(batch))
+
+
+_plant_disease_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_plant_disease_batcher():
+    """Return the process-wide batcher in front of the plant disease model"""
+    global _plant_disease_batcher
+    if _plant_disease_batcher is None:
+        with _batcher_lock:
+            if _plant_disease_batcher is None:
+                _plant_disease_batcher = MicroBatcher(_predict_plant_disease_batch)
+    return _plant_disease_batcher
+
+
+def configure_plant_disease_batcher(max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    """Replace the shared batcher with one using new batching limits"""
+    global _plant_disease_batcher
+    with _batcher_lock:
+        if _plant_disease_batcher is not None:
+            _plant_disease_batcher.close()
+        _plant_disease_batcher = MicroBatcher(
+            _predict_plant_disease_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms
+        )
+    return _plant_disease_batcher
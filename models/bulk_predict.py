@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Bulk plant disease prediction over a directory, glob or CSV manifest of images
+
+Images are decoded by a pool of loader threads, scored in fixed-size batches
+and streamed to a JSONL or CSV file as they are produced, e.g.:
+
+    python models/bulk_predict.py "surveys/field_12" -o field_12.jsonl
+    python models/bulk_predict.py "surveys/*/IMG_*.jpg" -o survey.csv
+    python models/bulk_predict.py manifest.csv -o results.jsonl --batch-size 64
+    python models/bulk_predict.py dataset/shards/test -o test.jsonl   # packed shards
+"""
+
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from model_registry import get_plant_disease_model
+from image_preprocessing import decode_leaf_image, to_model_input
+from prediction_output import format_prediction, class_vocabulary
+from dataset_shards import ShardedImageDataset, is_shard_dir
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+MANIFEST_PATH_COLUMNS = ('image_path', 'path', 'filename', 'file')
+CSV_FIELDS = ['image_path', 'disease', 'confidence', 'top_predictions', 'error']
+
+
+def list_image_paths(source):
+    """Resolve a directory, glob pattern or CSV manifest into image paths"""
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.append(os.path.join(root, name))
+        return sorted(paths)
+
+    if os.path.isfile(source) and source.lower().endswith('.csv'):
+        return _read_manifest(source)
+
+    return sorted(p for p in glob.glob(source, recursive=True) if p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def _read_manifest(manifest_path):
+    """Read image paths from a CSV manifest (relative paths are taken from the manifest folder)"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, newline='') as f:
+        reader = csv.DictReader(f)
+        column = next((c for c in MANIFEST_PATH_COLUMNS if c in (reader.fieldnames or [])), None)
+        if column is None:
+            column = reader.fieldnames[0]
+        return [os.path.join(base_dir, row[column]) for row in reader if row.get(column)]
+
+
+def _load_or_error(image_path):
+    try:
+        return image_path, decode_leaf_image(image_path), None
+    except Exception as e:
+        return image_path, None, str(e)
+
+
+def iter_decoded_images(paths, workers, prefetch):
+    """Decode images in parallel (kept as uint8) while holding only a bounded window in memory"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for path in paths:
+            pending.append(executor.submit(_load_or_error, path))
+            if len(pending) >= prefetch:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def _iter_batches(loaded, batch_size):
+    """Group decoded images into (paths, uint8 batch, errors); decode failures are passed through"""
+    batch = []
+    for path, array, error in loaded:
+        if error is not None:
+            yield [], None, [(path, error)]
+            continue
+        batch.append((path, array))
+        if len(batch) >= batch_size:
+            yield [p for p, _ in batch], np.stack([a for _, a in batch]), []
+            batch = []
+    if batch:
+        yield [p for p, _ in batch], np.stack([a for _, a in batch]), []
+
+
+def _iter_shard_batches(shards, batch_size):
+    """Same batches read sequentially from a packed split, with no decoding at all"""
+    for images, _, names in shards.iter_batches(batch_size):
+        yield names, images, []
+
+
+def _prediction_record(image_path, probabilities, class_names, top_k, output_mode):
+    record = {"image_path": image_path}
+    record.update(format_prediction(probabilities, class_names, output_mode=output_mode, top_k=top_k))
+    return record
+
+
+class _ResultWriter:
+    """Streams result records to JSONL or CSV depending on the file extension"""
+
+    def __init__(self, output_path):
+        self.file = open(output_path, 'w', newline='')
+        self.is_csv = output_path.lower().endswith('.csv')
+        if self.is_csv:
+            self.writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            self.writer.writeheader()
+
+    def write(self, record):
+        if self.is_csv:
+            row = {field: record.get(field) for field in CSV_FIELDS}
+            if row["top_predictions"]:
+                row["top_predictions"] = ";".join(f"{name}:{conf:.4f}" for name, conf in row["top_predictions"])
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+def predict_plant_disease_bulk(source, output_path, batch_size=32, workers=None, top_k=3,
+                               progress_every=500, output_mode="top_k"):
+    """Score every image in ``source`` and stream results to ``output_path``
+
+    ``source`` is a directory, glob, CSV manifest, list of paths or a packed
+    shard split directory (see models/dataset_shards.py).
+
+    ``output_mode`` "compact" adds the packed per-class probabilities to each
+    JSONL record and writes the class vocabulary next to the output file; the
+    CSV output has no column for them, so that combination is rejected.
+    Returns a summary with counts, elapsed time and images/sec.
+    """
+    if output_mode == "compact" and output_path.lower().endswith('.csv'):
+        raise ValueError("output_mode 'compact' needs a JSONL output; CSV has no probabilities column")
+    model, class_names = get_plant_disease_model()
+    shards = ShardedImageDataset(source) if isinstance(source, str) and is_shard_dir(source) else None
+    if shards is None:
+        paths = list_image_paths(source) if isinstance(source, str) else list(source)
+        total_images = len(paths)
+    else:
+        total_images = len(shards)
+    workers = workers or min(8, os.cpu_count() or 1)
+    top_k = max(1, min(top_k, len(class_names)))
+
+    if output_mode == "compact":
+        # Packed probabilities are indexed by this vocabulary
+        with open(f"{os.path.splitext(output_path)[0]}.vocab.json", 'w') as f:
+            json.dump(class_vocabulary(class_names), f)
+
+    writer = _ResultWriter(output_path)
+    processed = 0
+    failed = 0
+    start_time = time.perf_counter()
+    next_report = progress_every
+
+    try:
+        if shards is None:
+            loaded = iter_decoded_images(paths, workers, prefetch=max(batch_size * 2, workers))
+            batches = _iter_batches(loaded, batch_size)
+        else:
+            batches = _iter_shard_batches(shards, batch_size)
+
+        for batch_paths, images, errors in batches:
+            for path, error in errors:
+                writer.write({"image_path": path, "error": error})
+                failed += 1
+
+            if batch_paths:
+                predictions = np.asarray(model.predict_on_batch(to_model_input(images)))
+                for path, probabilities in zip(batch_paths, predictions):
+                    writer.write(_prediction_record(path, probabilities, class_names, top_k, output_mode))
+                processed += len(batch_paths)
+
+            done = processed + failed
+            if progress_every and done >= next_report:
+                elapsed = time.perf_counter() - start_time
+                print(f"   {done}/{total_images} images ({processed / elapsed:.1f} images/sec)", flush=True)
+                next_report += progress_every
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "total_images": total_images,
+        "predicted": processed,
+        "failed": failed,
+        "elapsed_seconds": elapsed,
+        "images_per_second": processed / elapsed if elapsed > 0 else 0.0,
+        "output_path": output_path
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk plant disease prediction")
+    parser.add_argument("source", help="Image directory, glob pattern, CSV manifest or packed shard split")
+    parser.add_argument("-o", "--output", default="predictions.jsonl", help="Output file (.jsonl or .csv)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=None, help="Image loader threads")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--progress-every", type=int, default=500)
+    parser.add_argument("--output-mode", choices=["top_k", "compact"], default="top_k",
+                        help="compact also stores packed per-class probabilities (JSONL)")
+    args = parser.parse_args()
+    if args.output_mode == "compact" and args.output.lower().endswith('.csv'):
+        parser.error("--output-mode compact needs a .jsonl output: the packed probabilities have no CSV column")
+
+    print(f"🌱 Bulk plant disease prediction: {args.source}")
+    summary = predict_plant_disease_bulk(
+        args.source,
+        args.output,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        top_k=args.top_k,
+        progress_every=args.progress_every,
+        output_mode=args.output_mode
+    )
+    print(f"✅ {summary['predicted']} predicted, {summary['failed']} failed "
+          f"in {summary['elapsed_seconds']:.1f}s ({summary['images_per_second']:.1f} images/sec)")
+    print(f"💾 Results: {summary['output_path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Packed image shards for the plant disease dataset
+
+A split (train/valid/test) is stored as a few large uint8 .npy arrays of
+already decoded, resized images plus a label index, so training, evaluation
+and bulk scoring read big sequential memory-mapped blocks instead of opening
+tens of thousands of small JPEGs:
+
+    <shard_dir>/<split>/index.json        class names, image size, shard list, image names
+    <shard_dir>/<split>/labels.npy        int16 class index per image (-1 when unlabelled)
+    <shard_dir>/<split>/shard-00000.npy   (n, size, size, 3) uint8
+"""
+
+import os
+import sys
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from image_preprocessing import decode_leaf_image, MODEL_IMAGE_SIZE
+
+INDEX_FILE = 'index.json'
+LABELS_FILE = 'labels.npy'
+SHARD_SIZE = 4096
+
+
+def is_shard_dir(path):
+    """True if ``path`` is a packed split directory"""
+    return os.path.isfile(os.path.join(path, INDEX_FILE))
+
+
+def _decode_or_none(path, size):
+    try:
+        return decode_leaf_image(path, size)
+    except Exception:
+        return None
+
+
+def pack_split(paths, labels, output_dir, class_names, image_size=MODEL_IMAGE_SIZE,
+               shard_size=SHARD_SIZE, workers=None, root=None):
+    """Decode ``paths`` in parallel and write them as shards into ``output_dir``
+
+    ``labels`` holds a class index per path (-1 for unlabelled images). Image
+    names are stored relative to ``root`` when given. Unreadable images are
+    skipped. Returns a summary dict.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or min(8, os.cpu_count() or 1)
+    shards, names, kept_labels = [], [], []
+    skipped = 0
+    start_time = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for shard_start in range(0, len(paths), shard_size):
+            chunk = list(zip(paths[shard_start:shard_start + shard_size], labels[shard_start:shard_start + shard_size]))
+            shard_file = f"shard-{len(shards):05d}.npy"
+            shard = np.lib.format.open_memmap(os.path.join(output_dir, shard_file), mode='w+', dtype=np.uint8,
+                                              shape=(len(chunk), image_size, image_size, 3))
+            row = 0
+            decoded = executor.map(lambda p: _decode_or_none(p, image_size), [p for p, _ in chunk])
+            for (path, label), image in zip(chunk, decoded):
+                if image is None:
+                    skipped += 1
+                    continue
+                shard[row] = image
+                names.append(os.path.relpath(path, root) if root else path)
+                kept_labels.append(label)
+                row += 1
+            shard.flush()
+            del shard
+
+            if row < len(chunk):
+                # Rewrite without the rows left empty by unreadable images
+                full_path = os.path.join(output_dir, shard_file)
+                tmp_path = f"{full_path}.tmp.npy"
+                np.save(tmp_path, np.load(full_path, mmap_mode='r')[:row])
+                os.replace(tmp_path, full_path)
+            shards.append({"file": shard_file, "count": row})
+
+            done = shard_start + len(chunk)
+            elapsed = time.perf_counter() - start_time
+            print(f"   {shard_file}: {done}/{len(paths)} images ({done / elapsed:.1f} images/sec)", flush=True)
+
+    np.save(os.path.join(output_dir, LABELS_FILE), np.asarray(kept_labels, dtype=np.int16))
+    index = {
+        "image_size": image_size,
+        "count": len(names),
+        "class_names": list(class_names),
+        "shards": shards,
+        "names": names
+    }
+    with open(os.path.join(output_dir, INDEX_FILE), 'w') as f:
+        json.dump(index, f)
+
+    return {
+        "output_dir": output_dir,
+        "images": len(names),
+        "skipped": skipped,
+        "shards": len(shards),
+        "elapsed_seconds": time.perf_counter() - start_time
+    }
+
+
+class ShardedImageDataset:
+    """Reads a packed split; shards are memory-mapped and read in large sequential blocks"""
+
+    def __init__(self, split_dir):
+        self.split_dir = split_dir
+        with open(os.path.join(split_dir, INDEX_FILE)) as f:
+            index = json.load(f)
+        self.image_size = index["image_size"]
+        self.class_names = index["class_names"]
+        self.names = index["names"]
+        self.shard_files = [s["file"] for s in index["shards"]]
+        self.shard_counts = [s["count"] for s in index["shards"]]
+        self.labels = np.load(os.path.join(split_dir, LABELS_FILE))
+        self.offsets = np.concatenate([[0], np.cumsum(self.shard_counts)]).astype(np.int64)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def shard(self, i):
+        return np.load(os.path.join(self.split_dir, self.shard_files[i]), mmap_mode='r')
+
+    def _blocks(self, block_size, shuffle, rng):
+        """(shard, start, stop) ranges, in file order or shuffled at block granularity"""
+        blocks = [(i, start, min(start + block_size, count))
+                  for i, count in enumerate(self.shard_counts)
+                  for start in range(0, count, block_size)]
+        if shuffle:
+            rng.shuffle(blocks)
+        return blocks
+
+    def iter_batches(self, batch_size=32, shuffle=False, seed=None, block_size=1024):
+        """Yield (images uint8, labels, names) batches
+
+        With ``shuffle`` the order of blocks of ``block_size`` images is
+        shuffled and each block is permuted in memory, so reads stay large and
+        sequential while batches still mix classes.
+        """
+        rng = np.random.default_rng(seed)
+        pending_images, pending_rows = [], []
+        pending = 0
+
+        for shard_index, start, stop in self._blocks(block_size, shuffle, rng):
+            images = np.asarray(self.shard(shard_index)[start:stop])
+            rows = np.arange(self.offsets[shard_index] + start, self.offsets[shard_index] + stop)
+            if shuffle:
+                order = rng.permutation(len(rows))
+                images, rows = images[order], rows[order]
+            pending_images.append(images)
+            pending_rows.append(rows)
+            pending += len(rows)
+
+            if pending >= batch_size:
+                images, rows = np.concatenate(pending_images), np.concatenate(pending_rows)
+                usable = len(rows) - len(rows) % batch_size
+                for i in range(0, usable, batch_size):
+                    batch_rows = rows[i:i + batch_size]
+                    yield images[i:i + batch_size], self.labels[batch_rows], [self.names[r] for r in batch_rows]
+                pending_images, pending_rows = [images[usable:]], [rows[usable:]]
+                pending = len(rows) - usable
+
+        if pending:
+            images, rows = np.concatenate(pending_images), np.concatenate(pending_rows)
+            yield images, self.labels[rows], [self.names[r] for r in rows]
@@ -0,0 +1,47 @@
+import io
+import numpy as np
+from PIL import Image
+
+MODEL_IMAGE_SIZE = 224
+
+
+def _open_image(source):
+    """Open a path, file-like object or raw encoded bytes with PIL (lazy, nothing decoded yet)"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    return Image.open(source)
+
+
+def decode_leaf_image(source, size=MODEL_IMAGE_SIZE):
+    """Decode an image straight to a (size, size, 3) uint8 RGB array
+
+    For JPEGs the decoder is asked for a reduced-resolution draft (DCT scaling
+    by 1/2, 1/4 or 1/8) no smaller than the target, so a 12 MP phone photo is
+    never materialized at full resolution. The final resize uses nearest
+    neighbour to match keras ``load_img`` and the training generators.
+    """
+    img = _open_image(source)
+    if img.format == 'JPEG':
+        img.draft('RGB', (size, size))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if img.size != (size, size):
+        img = img.resize((size, size), Image.NEAREST)
+    return np.asarray(img, dtype=np.uint8)
+
+
+def to_model_input(images):
+    """Scale uint8 images to float32 in [0, 1] in one vectorized op
+
+    Works on a single image or a stacked batch; float input is assumed to be
+    normalized already and is passed through as float32.
+    """
+    images = np.asarray(images)
+    if images.dtype == np.uint8:
+        return np.multiply(images, np.float32(1.0 / 255.0), dtype=np.float32)
+    return images.astype(np.float32, copy=False)
+
+
+def load_image_for_model(source, size=MODEL_IMAGE_SIZE):
+    """Decode and normalize one image into a (size, size, 3) float32 array"""
+    return to_model_input(decode_leaf_image(source, size))
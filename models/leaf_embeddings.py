@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Leaf embeddings and a nearest-neighbour index for "similar confirmed cases"
+
+The embedding is the pooled MobileNetV2 feature vector that the disease
+classifier already computes before its dense head. The index stores the
+L2-normalized vectors as a memory-mapped float16 matrix, ordered by IVF list so
+approximate search reads only a few contiguous slices:
+
+    python models/leaf_embeddings.py build "dataset/.../train" history.csv -o models/leaf_index
+    python models/leaf_embeddings.py search leaf.jpg -k 5 --mode approximate
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+import threading
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from model_registry import model_registry, MODELS_DIR
+from image_preprocessing import decode_leaf_image, to_model_input
+from bulk_predict import list_image_paths, iter_decoded_images
+
+INDEX_DIR = os.getenv("PLANT_DISEASE_INDEX_DIR", os.path.join(MODELS_DIR, 'leaf_index'))
+SEARCH_CHUNK_ROWS = 65536
+
+_embedding_model = None
+_embedding_lock = threading.Lock()
+
+
+def embedding_model_version():
+    """Version id of the backbone the embeddings come from"""
+    return model_registry.fingerprint("plant_disease_model")
+
+
+def get_embedding_model():
+    """Classifier truncated after its global pooling layer (shares weights with the resident model)"""
+    global _embedding_model
+    if _embedding_model is None:
+        with _embedding_lock:
+            if _embedding_model is None:
+                import tensorflow as tf
+                model = model_registry.get("plant_disease_model")
+                pool_index = next(i for i, layer in enumerate(model.layers)
+                                  if isinstance(layer, tf.keras.layers.GlobalAveragePooling2D))
+                _embedding_model = tf.keras.Sequential(model.layers[:pool_index + 1])
+    return _embedding_model
+
+
+def _l2_normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def extract_embeddings(images):
+    """L2-normalized float32 embeddings for a (N, 224, 224, 3) batch (uint8 or normalized float)"""
+    embeddings = np.asarray(get_embedding_model().predict_on_batch(to_model_input(images)), dtype=np.float32)
+    return _l2_normalize(embeddings)
+
+
+def extract_embedding(image_source):
+    """Embedding for one image path or encoded image bytes"""
+    return extract_embeddings(decode_leaf_image(image_source)[np.newaxis])[0]
+
+
+def _labelled_paths(source):
+    """(image_path, label) pairs from a class-folder tree, CSV manifest (with a label column) or glob"""
+    if os.path.isfile(source) and source.lower().endswith('.csv'):
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, newline='') as f:
+            reader = csv.DictReader(f)
+            fields = reader.fieldnames or []
+            path_column = next((c for c in ('image_path', 'path', 'filename', 'file') if c in fields), fields[0])
+            label_column = next((c for c in ('label', 'disease', 'class') if c in fields), None)
+            return [(os.path.join(base_dir, row[path_column]), row.get(label_column) if label_column else None)
+                    for row in reader if row.get(path_column)]
+
+    if os.path.isdir(source):
+        # Class-folder layout: the parent folder name is the confirmed label
+        return [(path, os.path.basename(os.path.dirname(path))) for path in list_image_paths(source)]
+
+    return [(path, None) for path in list_image_paths(source)]
+
+
+def _train_ivf(vectors, n_lists, seed=42):
+    """Coarse quantizer for approximate search (spherical k-means on a sample)"""
+    from sklearn.cluster import MiniBatchKMeans
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), max(n_lists * 64, 20000))
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=seed, n_init=3, batch_size=4096)
+    kmeans.fit(sample)
+    return _l2_normalize(kmeans.cluster_centers_.astype(np.float32))
+
+
+def _assign_lists(vectors, centroids):
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), SEARCH_CHUNK_ROWS):
+        chunk = np.asarray(vectors[start:start + SEARCH_CHUNK_ROWS], dtype=np.float32)
+        assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+def build_leaf_index(sources, index_dir=INDEX_DIR, batch_size=64, workers=None, n_lists=None, progress_every=2000):
+    """Embed every labelled image in ``sources`` and write an on-disk index to ``index_dir``"""
+    items = []
+    for source in sources:
+        items.extend(_labelled_paths(source))
+    if not items:
+        raise ValueError("No images found in the given sources")
+
+    os.makedirs(index_dir, exist_ok=True)
+    labels = dict(items)
+    workers = workers or min(8, os.cpu_count() or 1)
+    start_time = time.perf_counter()
+
+    # Stream embeddings to a scratch float16 file so memory stays flat
+    raw_file = tempfile.NamedTemporaryFile(dir=index_dir, suffix='.f16', delete=False)
+    metadata = []
+    dimension = None
+    pending = []
+
+    def flush(batch):
+        nonlocal dimension
+        embeddings = extract_embeddings(np.stack([array for _, array in batch])).astype(np.float16)
+        dimension = embeddings.shape[1]
+        raw_file.write(embeddings.tobytes())
+        for path, _ in batch:
+            metadata.append({"image_path": path, "label": labels.get(path)})
+
+    try:
+        paths = [path for path, _ in items]
+        for path, array, error in iter_decoded_images(paths, workers, prefetch=max(batch_size * 2, workers)):
+            if error is None:
+                pending.append((path, array))
+            if len(pending) >= batch_size:
+                flush(pending)
+                pending = []
+                if progress_every and len(metadata) % progress_every < batch_size:
+                    rate = len(metadata) / (time.perf_counter() - start_time)
+                    print(f"   {len(metadata)}/{len(paths)} embedded ({rate:.1f} images/sec)", flush=True)
+        if pending:
+            flush(pending)
+        raw_file.close()
+
+        count = len(metadata)
+        if count == 0:
+            raise ValueError("None of the images could be decoded")
+        raw = np.memmap(raw_file.name, dtype=np.float16, mode='r', shape=(count, dimension))
+
+        # IVF lists; vectors are stored list by list so each list is a contiguous slice
+        n_lists = n_lists or int(np.clip(4 * np.sqrt(count), 1, 4096))
+        n_lists = min(n_lists, count)
+        centroids = _train_ivf(raw, n_lists)
+        assignments = _assign_lists(raw, centroids)
+        order = np.argsort(assignments, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))]).astype(np.int64)
+
+        vectors = np.lib.format.open_memmap(os.path.join(index_dir, 'vectors.f16.npy'), mode='w+',
+                                            dtype=np.float16, shape=(count, dimension))
+        for start in range(0, count, SEARCH_CHUNK_ROWS):
+            rows = order[start:start + SEARCH_CHUNK_ROWS]
+            # Gather in file order (sequential reads), then restore the list order
+            vectors[start:start + len(rows)] = raw[np.sort(rows)][np.argsort(np.argsort(rows))]
+        vectors.flush()
+        del vectors, raw
+    finally:
+        raw_file.close()
+        if os.path.exists(raw_file.name):
+            os.remove(raw_file.name)
+
+    np.save(os.path.join(index_dir, 'ivf_centroids.npy'), centroids)
+    np.save(os.path.join(index_dir, 'ivf_offsets.npy'), offsets)
+    with open(os.path.join(index_dir, 'metadata.jsonl'), 'w') as f:
+        for i in order:
+            f.write(json.dumps(metadata[i]) + "\n")
+
+    info = {
+        "count": count,
+        "dimension": dimension,
+        "n_lists": n_lists,
+        "model_version": embedding_model_version(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "build_seconds": time.perf_counter() - start_time
+    }
+    with open(os.path.join(index_dir, 'index.json'), 'w') as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+class LeafEmbeddingIndex:
+    """Memory-mapped cosine-similarity index over leaf embeddings"""
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, 'index.json')) as f:
+            self.info = json.load(f)
+        self.vectors = np.load(os.path.join(index_dir, 'vectors.f16.npy'), mmap_mode='r')
+        self.centroids = np.load(os.path.join(index_dir, 'ivf_centroids.npy'))
+        self.offsets = np.load(os.path.join(index_dir, 'ivf_offsets.npy'))
+        with open(os.path.join(index_dir, 'metadata.jsonl')) as f:
+            self.metadata = [json.loads(line) for line in f]
+
+    def __len__(self):
+        return len(self.metadata)
+
+    @staticmethod
+    def _merge_top_k(best_ids, best_scores, ids, scores, k):
+        ids = np.concatenate([best_ids, ids])
+        scores = np.concatenate([best_scores, scores])
+        if len(scores) > k:
+            keep = np.argpartition(scores, -k)[-k:]
+            ids, scores = ids[keep], scores[keep]
+        return ids, scores
+
+    def _scan(self, query, ranges, k):
+        best_ids = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for range_start, range_end in ranges:
+            for start in range(range_start, range_end, SEARCH_CHUNK_ROWS):
+                end = min(start + SEARCH_CHUNK_ROWS, range_end)
+                scores = np.asarray(self.vectors[start:end], dtype=np.float32) @ query
+                best_ids, best_scores = self._merge_top_k(
+                    best_ids, best_scores, np.arange(start, end, dtype=np.int64), scores, k)
+        order = np.argsort(best_scores)[::-1]
+        return best_ids[order], best_scores[order]
+
+    def search(self, query, k=5, mode="exact", nprobe=8):
+        """Top-k most similar entries to an embedding
+
+        ``mode`` "exact" scans every vector; "approximate" scans only the
+        ``nprobe`` IVF lists whose centroids are closest to the query.
+        """
+        query = _l2_normalize(np.asarray(query, dtype=np.float32))
+        if mode == "exact":
+            ranges = [(0, len(self))]
+        elif mode == "approximate":
+            nprobe = min(nprobe, len(self.centroids))
+            lists = np.argpartition(self.centroids @ query, -nprobe)[-nprobe:]
+            ranges = [(int(self.offsets[l]), int(self.offsets[l + 1])) for l in sorted(lists)]
+        else:
+            raise ValueError(f"Unknown search mode '{mode}', expected 'exact' or 'approximate'")
+
+        ids, scores = self._scan(query, ranges, k)
+        return [dict(self.metadata[i], similarity=round(float(s), 4)) for i, s in zip(ids, scores)]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_leaf_index(index_dir=INDEX_DIR):
+    """Process-wide index instance (opened on first use)"""
+    global _index
+    if _index is None or _index.index_dir != index_dir:
+        with _index_lock:
+            if _index is None or _index.index_dir != index_dir:
+                _index = LeafEmbeddingIndex(index_dir)
+    return _index
+
+
+def find_similar_cases(image_source, k=5, mode="approximate", nprobe=8, index_dir=INDEX_DIR):
+    """Embed an image and return the k most similar indexed cases"""
+    index = get_leaf_index(index_dir)
+    start_time = time.perf_counter()
+    matches = index.search(extract_embedding(image_source), k=k, mode=mode, nprobe=nprobe)
+    result = {
+        "matches": matches,
+        "search_mode": mode,
+        "indexed_images": len(index),
+        "elapsed_ms": (time.perf_counter() - start_time) * 1000
+    }
+    if index.info.get("model_version") != embedding_model_version():
+        result["warning"] = "Index was built with a different model; rebuild it for reliable matches"
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leaf embedding index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Build the index from labelled images")
+    build.add_argument("sources", nargs="+", help="Class-folder directories, CSV manifests (image_path,label) or globs")
+    build.add_argument("-o", "--index-dir", default=INDEX_DIR)
+    build.add_argument("--batch-size", type=int, default=64)
+    build.add_argument("--workers", type=int, default=None)
+    build.add_argument("--n-lists", type=int, default=None, help="IVF lists (default 4*sqrt(N))")
+
+    search = subparsers.add_parser("search", help="Find similar cases for an image")
+    search.add_argument("image")
+    search.add_argument("-k", type=int, default=5)
+    search.add_argument("--mode", choices=["exact", "approximate"], default="approximate")
+    search.add_argument("--nprobe", type=int, default=8)
+    search.add_argument("--index-dir", default=INDEX_DIR)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        print(f"🌿 Building leaf embedding index: {args.index_dir}")
+        info = build_leaf_index(args.sources, args.index_dir, args.batch_size, args.workers, args.n_lists)
+        print(f"✅ Indexed {info['count']} images ({info['dimension']}-d, {info['n_lists']} lists) "
+              f"in {info['build_seconds']:.1f}s")
+    else:
+        result = find_similar_cases(args.image, k=args.k, mode=args.mode, nprobe=args.nprobe, index_dir=args.index_dir)
+        for match in result["matches"]:
+            print(f"   {match['similarity']:.3f}  {match['label']}  {match['image_path']}")
+        print(f"⏱️  {result['elapsed_ms']:.1f} ms over {result['indexed_images']} images ({result['search_mode']})")
+
+
+if __name__ == "__main__":
+    main()
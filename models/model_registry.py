@@ -0,0 +1,216 @@
+import os
+import hashlib
+import threading
+import time
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PLANT_DISEASE_MODEL_PATH = os.path.join(MODELS_DIR, 'plant_disease_model.h5')
+PLANT_DISEASE_CLASSES_PATH = os.path.join(MODELS_DIR, 'plant_disease_classes.pkl')
+PLANT_DISEASE_TFLITE_DYNAMIC_PATH = os.path.join(MODELS_DIR, 'plant_disease_model_dynamic.tflite')
+PLANT_DISEASE_TFLITE_INT8_PATH = os.path.join(MODELS_DIR, 'plant_disease_model_int8.tflite')
+MULTI_CROP_MODEL_PATH = os.path.join(MODELS_DIR, 'multi_crop_yield_model.pkl')
+MULTI_CROP_ENCODERS_PATH = os.path.join(MODELS_DIR, 'multi_crop_label_encoders.pkl')
+MULTI_CROP_FEATURES_PATH = os.path.join(MODELS_DIR, 'multi_crop_feature_names.pkl')
+
+
+def _load_joblib(path):
+    """Load a pickled artifact (joblib, and sklearn behind it, load on first use)"""
+    import joblib
+    return joblib.load(path)
+
+
+def _load_keras_model(path):
+    """Load a Keras model (TensorFlow is only imported when a model is needed)"""
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
+
+
+def _load_tflite_model(path):
+    """Load a TFLite model behind the same predict_on_batch interface"""
+    from tflite_backend import load_tflite_classifier
+    return load_tflite_classifier(path)
+
+
+class ModelRegistry:
+    """Process-wide store of model artifacts, each loaded once on first use
+
+    ``default_warmup`` returns the artifact names a bare ``warmup()`` loads
+    (default: all registered), so alternative backends are not loaded too.
+    """
+
+    def __init__(self, default_warmup=None):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.default_warmup = default_warmup
+
+    def register(self, name, path, loader=_load_joblib):
+        """Register an artifact; nothing is read from disk until it is requested"""
+        with self._lock:
+            self._entries[name] = {
+                "path": path,
+                "loader": loader,
+                "lock": threading.Lock(),
+                "value": None,
+                "state": "not_loaded",
+                "load_seconds": None,
+                "error": None
+            }
+
+    def get(self, name):
+        """Return the loaded artifact, loading it on the first call"""
+        entry = self._entries[name]
+        value = entry["value"]
+        if value is not None:
+            return value
+
+        with entry["lock"]:
+            # Another thread may have finished loading while we waited
+            if entry["state"] == "ready":
+                return entry["value"]
+
+            if not os.path.exists(entry["path"]):
+                entry["state"] = "missing"
+                entry["error"] = f"File not found: {entry['path']}"
+                raise FileNotFoundError(entry["error"])
+
+            entry["state"] = "loading"
+            start_time = time.perf_counter()
+            try:
+                value = entry["loader"](entry["path"])
+            except Exception as e:
+                entry["state"] = "error"
+                entry["error"] = str(e)
+                raise
+
+            entry["value"] = value
+            entry["load_seconds"] = time.perf_counter() - start_time
+            entry["error"] = None
+            entry["state"] = "ready"
+            return value
+
+    def is_available(self, *names):
+        """Check that the files behind the given artifacts exist on disk"""
+        return all(os.path.exists(self._entries[name]["path"]) for name in names)
+
+    def fingerprint(self, *names):
+        """Short version id for the given artifacts, derived from their path, size and mtime
+
+        Retraining or re-exporting a model changes the fingerprint, which is what
+        result caches key on.
+        """
+        digest = hashlib.sha1()
+        for name in names:
+            path = self._entries[name]["path"]
+            stat = os.stat(path)
+            digest.update(f"{name}:{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()[:16]
+
+    def is_ready(self, *names):
+        """Check whether the given artifacts (default: all) are loaded"""
+        names = names or tuple(self._entries)
+        return all(self._entries[name]["state"] == "ready" for name in names)
+
+    def warmup(self, *names):
+        """Eagerly load artifacts (default: see default_warmup) and return their status"""
+        names = names or (tuple(self.default_warmup()) if self.default_warmup else tuple(self._entries))
+        for name in names:
+            if not self.is_available(name):
+                self._entries[name]["state"] = "missing"
+                continue
+            try:
+                self.get(name)
+            except Exception:
+                pass  # Recorded in the entry status
+        return self.status(*names)
+
+    def status(self, *names):
+        """Readiness report for the given artifacts (default: all)"""
+        names = names or tuple(self._entries)
+        report = {}
+        for name in names:
+            entry = self._entries[name]
+            report[name] = {
+                "state": entry["state"],
+                "path": entry["path"],
+                "load_seconds": entry["load_seconds"],
+                "error": entry["error"]
+            }
+        return report
+
+    def unload(self, *names):
+        """Drop loaded artifacts so the next request reloads them from disk"""
+        names = names or tuple(self._entries)
+        for name in names:
+            entry = self._entries[name]
+            with entry["lock"]:
+                entry["value"] = None
+                entry["state"] = "not_loaded"
+                entry["load_seconds"] = None
+                entry["error"] = None
+
+
+# Shared registry for the whole process; warming it up loads only the selected disease backend
+model_registry = ModelRegistry(default_warmup=lambda: (*plant_disease_artifacts(), *CROP_YIELD_ARTIFACTS))
+model_registry.register("plant_disease_model", PLANT_DISEASE_MODEL_PATH, loader=_load_keras_model)
+model_registry.register("plant_disease_tflite_dynamic", PLANT_DISEASE_TFLITE_DYNAMIC_PATH, loader=_load_tflite_model)
+model_registry.register("plant_disease_tflite_int8", PLANT_DISEASE_TFLITE_INT8_PATH, loader=_load_tflite_model)
+model_registry.register("plant_disease_classes", PLANT_DISEASE_CLASSES_PATH)
+model_registry.register("multi_crop_yield_model", MULTI_CROP_MODEL_PATH)
+model_registry.register("multi_crop_label_encoders", MULTI_CROP_ENCODERS_PATH)
+model_registry.register("multi_crop_feature_names", MULTI_CROP_FEATURES_PATH)
+
+CROP_YIELD_ARTIFACTS = ("multi_crop_yield_model", "multi_crop_label_encoders", "multi_crop_feature_names")
+
+# Inference backends for the disease classifier (select with PLANT_DISEASE_BACKEND)
+PLANT_DISEASE_BACKENDS = {
+    "keras": "plant_disease_model",
+    "tflite_dynamic": "plant_disease_tflite_dynamic",
+    "tflite_int8": "plant_disease_tflite_int8"
+}
+_plant_disease_backend = os.getenv("PLANT_DISEASE_BACKEND", "keras")
+
+
+def set_plant_disease_backend(backend):
+    """Switch the disease classifier backend for this process"""
+    global _plant_disease_backend
+    if backend not in PLANT_DISEASE_BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {list(PLANT_DISEASE_BACKENDS)}")
+    _plant_disease_backend = backend
+
+
+def get_plant_disease_backend():
+    """Name of the selected disease classifier backend"""
+    return _plant_disease_backend
+
+
+def plant_disease_artifacts():
+    """Artifacts required by the selected disease classifier backend"""
+    return (PLANT_DISEASE_BACKENDS[_plant_disease_backend], "plant_disease_classes")
+
+
+def plant_disease_model_version():
+    """Version id of the selected disease backend and its class list"""
+    return f"{_plant_disease_backend}-{model_registry.fingerprint(*plant_disease_artifacts())}"
+
+
+def get_plant_disease_model():
+    """Return the resident (model, class_names) pair for disease detection
+
+    The model is a Keras model or a TFLiteClassifier depending on the selected
+    backend; both expose ``predict_on_batch``.
+    """
+    return (model_registry.get(PLANT_DISEASE_BACKENDS[_plant_disease_backend]),
+            model_registry.get("plant_disease_classes"))
+
+
+def get_crop_yield_model():
+    """Return the resident (model, encoders, feature_names) for yield prediction"""
+    return (model_registry.get("multi_crop_yield_model"),
+            model_registry.get("multi_crop_label_encoders"),
+            model_registry.get("multi_crop_feature_names"))
+
+
+def warmup_models():
+    """Load the selected disease backend and the yield model up front (e.g. at worker start)"""
+    return model_registry.warmup()
@@ -1,34 +1,52 @@
+import os
+import sys
 
-import tensorflow as tf
-import numpy as np
-import joblib
-from tensorflow.keras.preprocessing import image
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from model_registry import get_plant_disease_model, plant_disease_model_version
+from prediction_cache import plant_disease_cache, make_cache_key
+from image_preprocessing import decode_leaf_image
+from prediction_output import format_prediction, class_vocabulary, DEFAULT_OUTPUT_MODE, DEFAULT_TOP_K
+from batch_inference import get_plant_disease_batcher
+from test_time_augmentation import predict_with_tta, TTA_ENABLED, TTA_CONFIDENCE_THRESHOLD
+from bulk_predict import predict_plant_disease_bulk
 
 def load_plant_disease_model():
-    """Load the trained plant disease detection model"""
-    model = tf.keras.models.load_model('../models/plant_disease_model.h5')
-    class_names = joblib.load('../models/plant_disease_classes.pkl')
-    return model, class_names
+    """Return the trained plant disease detection model (loaded once per process)"""
+    return get_plant_disease_model()
+
+def get_class_vocabulary():
+    """Class-index vocabulary used by the compact output mode"""
+    _, class_names = load_plant_disease_model()
+    return class_vocabulary(class_names)
+
+def predict_plant_disease(image_path, output_mode=DEFAULT_OUTPUT_MODE, top_k=DEFAULT_TOP_K,
+                          tta=TTA_ENABLED, tta_threshold=TTA_CONFIDENCE_THRESHOLD):
+    """Predict plant disease from image path
 
-def predict_plant_disease(image_path):
-    """Predict plant disease from image path"""
+    ``output_mode`` is "top_k" (default), "compact" or "full"; see
+    prediction_output.format_prediction. With ``tta`` enabled, predictions
+    below ``tta_threshold`` confidence are re-scored with test-time augmentation.
+    """
     model, class_names = load_plant_disease_model()
 
-    # Load and preprocess image
-    img = image.load_img(image_path, target_size=(224, 224))
-    img_array = image.img_to_array(img)
-    img_array = np.expand_dims(img_array, axis=0)
-    img_array /= 255.0
+    with open(image_path, "rb") as f:
+        image_bytes = f.read()
+    cache_key = make_cache_key(image_bytes, plant_disease_model_version(), namespace=f"predictor:{output_mode}:{top_k}:{tta and tta_threshold}")
+    cached_result = plant_disease_cache.get(cache_key)
+    if cached_result is not None:
+        return cached_result
 
-    # Make prediction
-    predictions = model.predict(img_array)
-    predicted_class_idx = np.argmax(predictions[0])
-    confidence = predictions[0][predicted_class_idx]
+    # Decode at reduced resolution; stays uint8 until the batch is normalized
+    img_array = decode_leaf_image(image_bytes)
 
-    predicted_class = class_names[predicted_class_idx]
+    # Make prediction (concurrent callers share one batched forward pass)
+    predictions = get_plant_disease_batcher().predict(img_array)
+    if tta:
+        predictions, tta_info = predict_with_tta(img_array, predictions, threshold=tta_threshold)
 
-    return {
-        "disease": predicted_class,
-        "confidence": float(confidence),
-        "all_predictions": {class_names[i]: float(predictions[0][i]) for i in range(len(class_names))}
-    }
+    result = format_prediction(predictions, class_names, output_mode=output_mode, top_k=top_k)
+    if tta:
+        result["tta"] = tta_info
+    plant_disease_cache.put(cache_key, result)
+    return result
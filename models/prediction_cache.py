@@ -0,0 +1,138 @@
+import os
+import copy
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+CACHE_SIZE = int(os.getenv("PLANT_DISEASE_CACHE_SIZE", "256"))
+CACHE_DIR = os.getenv("PLANT_DISEASE_CACHE_DIR", "")
+CACHE_DURATION_HOURS = float(os.getenv("PLANT_DISEASE_CACHE_TTL_HOURS", "24"))
+
+
+def make_cache_key(image_bytes, model_version, namespace="prediction"):
+    """Content address for a prediction: image bytes + model version + result kind"""
+    digest = hashlib.sha256()
+    digest.update(namespace.encode())
+    digest.update(b"\0")
+    digest.update(model_version.encode())
+    digest.update(b"\0")
+    digest.update(image_bytes)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """Two-tier cache for prediction results
+
+    Results live in a bounded in-memory LRU; when ``cache_dir`` is set they are
+    also written there as JSON files and reused until ``ttl_hours`` expires.
+    Keys already include the model version, so entries for an old model are
+    simply never looked up again.
+    """
+
+    def __init__(self, max_entries=CACHE_SIZE, cache_dir=CACHE_DIR, ttl_hours=CACHE_DURATION_HOURS):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir or None
+        self.ttl_seconds = ttl_hours * 3600
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = {"memory": 0, "disk": 0}
+        self._misses = 0
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return a copy of the cached result, or None on a miss"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._hits["memory"] += 1
+                return copy.deepcopy(self._memory[key])
+
+        if self.cache_dir:
+            result = self._read_disk(key)
+            if result is not None:
+                self._remember(key, result)
+                with self._lock:
+                    self._hits["disk"] += 1
+                return copy.deepcopy(result)
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key, result):
+        """Store a result in memory and, if enabled, on disk"""
+        self._remember(key, copy.deepcopy(result))
+        if self.cache_dir:
+            self._write_disk(key, result)
+
+    def _read_disk(self, key):
+        path = self._disk_path(key)
+        try:
+            if not os.path.exists(path):
+                return None
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, result):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def purge_expired(self):
+        """Delete on-disk entries older than the TTL; returns how many were removed"""
+        if not self.cache_dir:
+            return 0
+        removed = 0
+        cutoff = time.time() - self.ttl_seconds
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if name.endswith(".json") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def clear(self):
+        """Drop the in-memory tier (the disk tier expires on its own)"""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_hits": self._hits["memory"],
+                "disk_hits": self._hits["disk"],
+                "misses": self._misses,
+                "disk_enabled": bool(self.cache_dir)
+            }
+
+
+# Shared cache for plant disease results in this process
+plant_disease_cache = PredictionCache()
@@ -0,0 +1,71 @@
+import os
+import base64
+import hashlib
+import numpy as np
+
+OUTPUT_MODES = ("top_k", "compact", "full")
+DEFAULT_OUTPUT_MODE = os.getenv("PLANT_DISEASE_OUTPUT_MODE", "top_k")
+DEFAULT_TOP_K = int(os.getenv("PLANT_DISEASE_TOP_K", "3"))
+CONFIDENCE_DECIMALS = 4
+
+
+def top_k_indices(probabilities, k):
+    """Indices of the k largest probabilities, best first (partial selection, no full sort)"""
+    probabilities = np.asarray(probabilities)
+    k = max(1, min(int(k), probabilities.shape[-1]))
+    if k == probabilities.shape[-1]:
+        return np.argsort(probabilities)[::-1]
+    candidates = np.argpartition(probabilities, -k)[-k:]
+    return candidates[np.argsort(probabilities[candidates])[::-1]]
+
+
+def top_k_predictions(probabilities, class_names, k=DEFAULT_TOP_K):
+    """[(class_name, confidence), ...] for the k best classes"""
+    return [(class_names[i], round(float(probabilities[i]), CONFIDENCE_DECIMALS))
+            for i in top_k_indices(probabilities, k)]
+
+
+def class_vocabulary(class_names):
+    """Index -> class name table plus a version id clients can cache it under"""
+    version = hashlib.sha1("\n".join(class_names).encode()).hexdigest()[:12]
+    return {"version": version, "classes": list(class_names)}
+
+
+def encode_probabilities(probabilities):
+    """Pack a probability vector as base64 little-endian float32 (4 bytes per class)"""
+    return base64.b64encode(np.asarray(probabilities, dtype='<f4').tobytes()).decode()
+
+
+def decode_probabilities(encoded):
+    """Inverse of encode_probabilities"""
+    return np.frombuffer(base64.b64decode(encoded), dtype='<f4')
+
+
+def format_prediction(probabilities, class_names, output_mode=DEFAULT_OUTPUT_MODE, top_k=DEFAULT_TOP_K):
+    """Build the prediction payload for one image
+
+    - ``top_k``: best class, its confidence and the top-k (class, confidence) pairs
+    - ``compact``: top_k plus every class probability as a packed float32 array
+      indexed by the class vocabulary (see ``class_vocabulary``)
+    - ``full``: top_k plus the legacy ``all_predictions`` {class_name: probability} dict
+    """
+    if output_mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode '{output_mode}', expected one of {list(OUTPUT_MODES)}")
+
+    probabilities = np.asarray(probabilities)
+    top_predictions = top_k_predictions(probabilities, class_names, top_k)
+    best = top_k_indices(probabilities, 1)[0]
+
+    result = {
+        "disease": class_names[best],
+        "confidence": float(probabilities[best]),
+        "top_predictions": top_predictions
+    }
+
+    if output_mode == "compact":
+        result["probabilities"] = encode_probabilities(probabilities)
+        result["class_vocabulary_version"] = class_vocabulary(class_names)["version"]
+    elif output_mode == "full":
+        result["all_predictions"] = {class_names[i]: float(probabilities[i]) for i in range(len(class_names))}
+
+    return result
@@ -0,0 +1,67 @@
+import os
+import time
+import numpy as np
+from PIL import Image
+
+from model_registry import get_plant_disease_model
+from image_preprocessing import to_model_input
+
+TTA_ENABLED = os.getenv("PLANT_DISEASE_TTA", "0") == "1"
+TTA_CONFIDENCE_THRESHOLD = float(os.getenv("PLANT_DISEASE_TTA_THRESHOLD", "0.6"))
+
+
+def _center_crop_resize(img, fraction, size):
+    width, height = img.size
+    crop_w, crop_h = int(width * fraction), int(height * fraction)
+    left, top = (width - crop_w) // 2, (height - crop_h) // 2
+    return img.crop((left, top, left + crop_w, top + crop_h)).resize((size, size), Image.BILINEAR)
+
+
+def tta_variants(image):
+    """Augmented copies of one (H, W, 3) uint8 image, stacked as a uint8 batch
+
+    Original, horizontal/vertical flips, a 90% center crop, two 80% corner
+    crops and +/-10 degree rotations (cropped so no fill border is visible).
+    """
+    size = image.shape[0]
+    img = Image.fromarray(image)
+    variants = [
+        image,
+        image[:, ::-1],
+        image[::-1, :],
+        np.asarray(_center_crop_resize(img, 0.9, size)),
+        np.asarray(img.crop((0, 0, int(size * 0.8), int(size * 0.8))).resize((size, size), Image.BILINEAR)),
+        np.asarray(img.crop((size - int(size * 0.8), size - int(size * 0.8), size, size)).resize((size, size), Image.BILINEAR)),
+        np.asarray(_center_crop_resize(img.rotate(10, resample=Image.BILINEAR), 0.8, size)),
+        np.asarray(_center_crop_resize(img.rotate(-10, resample=Image.BILINEAR), 0.8, size)),
+    ]
+    return np.stack(variants).astype(np.uint8, copy=False)
+
+
+def predict_with_tta(image, base_probabilities=None, threshold=TTA_CONFIDENCE_THRESHOLD):
+    """Average predictions over augmented copies when the plain prediction is unsure
+
+    ``base_probabilities`` is the prediction already made for the plain image.
+    If its top confidence reaches ``threshold`` it is returned unchanged;
+    otherwise all variants go through the model as a single batch. Returns
+    (probabilities, tta_info).
+    """
+    if base_probabilities is not None:
+        base_confidence = float(np.max(base_probabilities))
+        if base_confidence >= threshold:
+            return np.asarray(base_probabilities), {"applied": False, "base_confidence": base_confidence}
+    else:
+        base_confidence = None
+
+    start_time = time.perf_counter()
+    model, _ = get_plant_disease_model()
+    batch = tta_variants(image)
+    probabilities = np.asarray(model.predict_on_batch(to_model_input(batch))).mean(axis=0)
+    latency_ms = (time.perf_counter() - start_time) * 1000
+
+    return probabilities, {
+        "applied": True,
+        "variants": len(batch),
+        "base_confidence": base_confidence,
+        "latency_ms": round(latency_ms, 1)
+    }
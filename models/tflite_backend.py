@@ -0,0 +1,102 @@
+import os
+import threading
+import numpy as np
+
+# Largest batch run in one pass; bigger batches are split
+TFLITE_MAX_BATCH_SIZE = int(os.getenv("TFLITE_MAX_BATCH_SIZE", "64"))
+
+
+def _load_interpreter_class():
+    """Prefer the standalone TFLite runtimes so serving does not need full TensorFlow"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class TFLiteClassifier:
+    """TFLite interpreter wrapper exposing the Keras ``predict_on_batch`` interface
+
+    Quantized inputs and outputs are converted with the tensor's own scale and
+    zero point, so callers always pass float32 images in [0, 1] and receive
+    float32 class probabilities, whichever model variant is loaded.
+    """
+
+    def __init__(self, model_path, num_threads=None, max_batch_size=TFLITE_MAX_BATCH_SIZE):
+        self._interpreter_class = _load_interpreter_class()
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.max_batch_size = max(1, int(max_batch_size))
+        # Resizing and reallocating tensors costs more than running a small
+        # batch, so batches are padded up to a power of two and each of those
+        # sizes keeps its own interpreter, allocated once
+        self._interpreters = {}
+        self.interpreter, self._input, self._output = self._interpreter_for(1)
+        # The interpreters keep per-call state, so calls are serialized
+        self._lock = threading.Lock()
+
+    def _interpreter_for(self, batch_size):
+        if batch_size not in self._interpreters:
+            interpreter = self._interpreter_class(model_path=self.model_path, num_threads=self.num_threads)
+            input_details = interpreter.get_input_details()[0]
+            if int(input_details['shape'][0]) != batch_size:
+                interpreter.resize_tensor_input(input_details['index'], [batch_size] + list(input_details['shape'][1:]))
+            interpreter.allocate_tensors()
+            self._interpreters[batch_size] = (interpreter, interpreter.get_input_details()[0],
+                                              interpreter.get_output_details()[0])
+        return self._interpreters[batch_size]
+
+    def _padded_size(self, count):
+        """Smallest power of two holding ``count`` images, capped at max_batch_size"""
+        return min(1 << (count - 1).bit_length(), self.max_batch_size)
+
+    def _quantize_input(self, batch):
+        dtype = self._input['dtype']
+        if dtype == np.float32:
+            return batch.astype(np.float32, copy=False)
+        scale, zero_point = self._input['quantization']
+        info = np.iinfo(dtype)
+        quantized = np.round(batch / scale + zero_point)
+        return np.clip(quantized, info.min, info.max).astype(dtype)
+
+    def _dequantize_output(self, output):
+        if output.dtype == np.float32:
+            return output
+        scale, zero_point = self._output['quantization']
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def predict_on_batch(self, batch):
+        """Run one forward pass over a (N, 224, 224, 3) float batch"""
+        batch = np.asarray(batch)
+        outputs = []
+        with self._lock:
+            for start in range(0, batch.shape[0], self.max_batch_size):
+                chunk = batch[start:start + self.max_batch_size]
+                count = chunk.shape[0]
+                padded_size = self._padded_size(count)
+                if padded_size > count:
+                    padding = np.zeros((padded_size - count,) + chunk.shape[1:], dtype=chunk.dtype)
+                    chunk = np.concatenate([chunk, padding])
+                self.interpreter, self._input, self._output = self._interpreter_for(padded_size)
+                self.interpreter.set_tensor(self._input['index'], self._quantize_input(chunk))
+                self.interpreter.invoke()
+                output = self.interpreter.get_tensor(self._output['index'])
+                outputs.append(self._dequantize_output(output[:count].copy()))
+        return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+    def predict(self, batch, verbose=0):
+        """Keras-compatible alias of predict_on_batch"""
+        return self.predict_on_batch(batch)
+
+
+def load_tflite_classifier(model_path):
+    """Registry loader for .tflite disease models"""
+    return TFLiteClassifier(model_path)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Pack the plant disease image folders into a few large uint8 shards
+
+Decodes every train/valid/test image once (resized to the model input size)
+and writes models/dataset_shards.py's format, so epochs read large sequential
+files instead of tens of thousands of small JPEGs:
+
+    python pack_plant_disease_dataset.py --output dataset/shards
+    python train_plant_disease_model.py --shards dataset/shards
+"""
+
+import os
+import sys
+import random
+import argparse
+
+sys.path.append('models')
+
+from dataset_shards import pack_split, SHARD_SIZE
+from image_preprocessing import MODEL_IMAGE_SIZE
+from plant_disease_dataset import list_labelled_files, IMAGE_EXTENSIONS
+
+DATASET_PATH = 'dataset/Plant Diseases Dataset/New Plant Diseases Dataset(Augmented)/New Plant Diseases Dataset(Augmented)'
+TEST_PATH = 'dataset/Plant Diseases Dataset/test/test'
+
+
+def pack_plant_disease_dataset(output_dir, dataset_path=DATASET_PATH, test_path=TEST_PATH,
+                               image_size=MODEL_IMAGE_SIZE, shard_size=SHARD_SIZE, workers=None, seed=42):
+    print("📦 Packing plant disease dataset into shards...")
+    print("=" * 60)
+    class_names = None
+
+    for split in ('train', 'valid'):
+        split_path = os.path.join(dataset_path, split)
+        if not os.path.exists(split_path):
+            print(f"❌ {split} data not found at: {split_path}")
+            return False
+
+        paths, labels, split_classes = list_labelled_files(split_path)
+        class_names = class_names or split_classes
+        if split == 'train':
+            # Shards are read in sequential blocks, so mix the classes once here
+            order = list(range(len(paths)))
+            random.Random(seed).shuffle(order)
+            paths, labels = [paths[i] for i in order], [labels[i] for i in order]
+
+        print(f"\n📁 {split}: {len(paths)} images, {len(split_classes)} classes")
+        summary = pack_split(paths, labels, os.path.join(output_dir, split), class_names,
+                             image_size, shard_size, workers, root=split_path)
+        print(f"✅ {summary['images']} images in {summary['shards']} shards "
+              f"({summary['skipped']} skipped) in {summary['elapsed_seconds']:.1f}s")
+
+    if os.path.exists(test_path):
+        paths = sorted(os.path.join(test_path, f) for f in os.listdir(test_path)
+                       if f.lower().endswith(IMAGE_EXTENSIONS))
+        print(f"\n📁 test: {len(paths)} images (unlabelled)")
+        summary = pack_split(paths, [-1] * len(paths), os.path.join(output_dir, 'test'), class_names,
+                             image_size, shard_size, workers, root=test_path)
+        print(f"✅ {summary['images']} images in {summary['shards']} shards "
+              f"({summary['skipped']} skipped) in {summary['elapsed_seconds']:.1f}s")
+
+    print(f"\n💾 Shards written to: {output_dir}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack the plant disease dataset into uint8 shards")
+    parser.add_argument("--output", default="dataset/shards", help="Output directory")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Folder containing train/ and valid/")
+    parser.add_argument("--test", default=TEST_PATH, help="Folder of unlabelled test images")
+    parser.add_argument("--image-size", type=int, default=MODEL_IMAGE_SIZE)
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="Images per shard")
+    parser.add_argument("--workers", type=int, default=None, help="Decoder threads")
+    args = parser.parse_args()
+
+    pack_plant_disease_dataset(args.output, args.dataset, args.test, args.image_size,
+                               args.shard_size, args.workers)
@@ -0,0 +1,154 @@
+"""
+Cached bottleneck-feature training for the plant disease classifier
+
+With the MobileNetV2 base frozen, only the dense head learns. So the backbone
+is run once over a fixed number of augmentation passes of the training set,
+the pooled features are stored in memory-mapped .npy files, and the head is
+then trained on those features for as many epochs as needed.
+"""
+
+import os
+import json
+import time
+import math
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import layers, models
+
+from plant_disease_dataset import ThroughputCallback
+
+FEATURE_STORE_DIR = 'models/bottleneck_cache'
+
+
+def _store_paths(store_dir, split):
+    return (os.path.join(store_dir, f'{split}_features.npy'),
+            os.path.join(store_dir, f'{split}_labels.npy'),
+            os.path.join(store_dir, f'{split}_meta.json'))
+
+
+def _store_signature(generator, passes, feature_dim):
+    """Describes what a feature store was computed from, to decide if it can be reused"""
+    return {
+        "samples": int(generator.samples),
+        "passes": int(passes),
+        "image_shape": list(generator.image_shape),
+        "class_indices": generator.class_indices,
+        "feature_dim": int(feature_dim)
+    }
+
+
+def _epoch_batches(source):
+    """One epoch of (images, one_hot) batches from a Keras generator or a PlantDiseaseDataset"""
+    if hasattr(source, 'reset'):
+        source.reset()
+        for _ in range(len(source)):
+            yield next(source)
+    else:
+        yield from source
+
+
+def compute_bottleneck_features(feature_extractor, generator, store_dir, split, passes):
+    """Run the frozen backbone over ``passes`` epochs of ``generator`` into a memmapped store
+
+    Each pass draws fresh augmentations from the generator, so the head still
+    sees ``passes`` differently augmented copies of every image. An existing
+    store computed from the same data and settings is reused as-is.
+    """
+    features_path, labels_path, meta_path = _store_paths(store_dir, split)
+    feature_dim = int(feature_extractor.output_shape[-1])
+    signature = _store_signature(generator, passes, feature_dim)
+
+    if os.path.exists(meta_path) and os.path.exists(features_path):
+        with open(meta_path) as f:
+            if json.load(f) == signature:
+                print(f"   - Reusing cached {split} features: {features_path}")
+                return np.load(features_path, mmap_mode='r'), np.load(labels_path)
+
+    os.makedirs(store_dir, exist_ok=True)
+    total = generator.samples * passes
+    features = np.lib.format.open_memmap(features_path, mode='w+', dtype=np.float16, shape=(total, feature_dim))
+    labels = np.empty(total, dtype=np.int16)
+
+    start_time = time.time()
+    row = 0
+    for pass_index in range(passes):
+        for images, one_hot in _epoch_batches(generator):
+            batch_features = feature_extractor.predict_on_batch(images)
+            features[row:row + len(images)] = batch_features
+            labels[row:row + len(images)] = np.argmax(one_hot, axis=1)
+            row += len(images)
+        print(f"   - {split} pass {pass_index + 1}/{passes}: {row} feature rows "
+              f"({row / (time.time() - start_time):.1f} images/sec)")
+
+    features.flush()
+    del features
+    np.save(labels_path, labels[:row])
+    with open(meta_path, 'w') as f:
+        json.dump(signature, f)
+    return np.load(features_path, mmap_mode='r'), labels[:row]
+
+
+class BottleneckFeatureSequence(tf.keras.utils.Sequence):
+    """Shuffled batches of cached features read straight from the memmap"""
+
+    def __init__(self, features, labels, num_classes, batch_size=256, shuffle=True, **kwargs):
+        super().__init__(**kwargs)
+        self.features = features
+        self.labels = labels
+        self.num_classes = num_classes
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.order = np.arange(len(labels))
+        self.on_epoch_end()
+
+    def __len__(self):
+        return math.ceil(len(self.labels) / self.batch_size)
+
+    def __getitem__(self, index):
+        # Sorted indices keep memmap reads mostly sequential
+        rows = np.sort(self.order[index * self.batch_size:(index + 1) * self.batch_size])
+        x = np.asarray(self.features[rows], dtype=np.float32)
+        y = tf.keras.utils.to_categorical(self.labels[rows], self.num_classes)
+        return x, y
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            np.random.shuffle(self.order)
+
+
+def train_head_on_bottleneck_features(model, train_generator, valid_generator, epochs, callbacks,
+                                      augmentation_passes=2, store_dir=FEATURE_STORE_DIR, batch_size=256):
+    """Train the dense head of ``model`` (base, pooling, head...) on cached backbone features
+
+    The head layers are shared with ``model``, so once this returns ``model``
+    holds the trained weights and can be saved as usual.
+    """
+    base_model, pooling = model.layers[0], model.layers[1]
+    head_layers = model.layers[2:]
+    num_classes = train_generator.num_classes
+
+    feature_extractor = models.Sequential([base_model, pooling])
+    feature_extractor.build((None,) + tuple(train_generator.image_shape))
+
+    print(f"\n🧊 Computing bottleneck features ({augmentation_passes} augmentation passes)...")
+    start_time = time.time()
+    train_features, train_labels = compute_bottleneck_features(
+        feature_extractor, train_generator, store_dir, 'train', augmentation_passes)
+    valid_features, valid_labels = compute_bottleneck_features(
+        feature_extractor, valid_generator, store_dir, 'valid', 1)
+    print(f"   - Feature extraction took {(time.time() - start_time) / 60:.1f} minutes")
+
+    head = models.Sequential([layers.Input(shape=(train_features.shape[1],))] + list(head_layers))
+    head.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+
+    print(f"\n🚀 Training head on {len(train_labels):,} cached feature rows...")
+    # Measured with the feature batch size, not the image generators' batch size
+    callbacks = list(callbacks) + [ThroughputCallback(batch_size)]
+    history = head.fit(
+        BottleneckFeatureSequence(train_features, train_labels, num_classes, batch_size),
+        epochs=epochs,
+        validation_data=BottleneckFeatureSequence(valid_features, valid_labels, num_classes, batch_size, shuffle=False),
+        callbacks=callbacks,
+        verbose=1
+    )
+    return history
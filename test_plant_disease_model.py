@@ -6,12 +6,18 @@ Run this after training the model to verify it works correctly
 
 import os
 import sys
+import tempfile
 sys.path.append('models')
 
+# Written by pack_plant_disease_dataset.py
+SHARD_TEST_DIR = "dataset/shards/test"
+
 def test_model():
     """Test the plant disease detection model"""
     try:
-        from models.plant_disease_predictor import predict_plant_disease
+        from models.plant_disease_predictor import predict_plant_disease, predict_plant_disease_bulk
+        from model_registry import model_registry, plant_disease_artifacts
+        from dataset_shards import is_shard_dir
         
         # Test with sample images
         test_dir = "dataset/Plant Diseases Dataset/test/test"
@@ -24,6 +30,12 @@ def test_model():
         print("Testing Plant Disease Detection Model...")
         print("=" * 50)
         
+        # Load the model once up front; every prediction below reuses it
+        status = model_registry.warmup(*plant_disease_artifacts())
+        for name, info in status.items():
+            load_time = f" in {info['load_seconds']:.2f}s" if info['load_seconds'] else ""
+            print(f"{name}: {info['state']}{load_time}")
+        
         for img_name in test_images:
             img_path = os.path.join(test_dir, img_name)
             try:
@@ -33,16 +45,21 @@ def test_model():
                 print(f"Confidence: {result['confidence']:.3f}")
                 print(f"Top 3 predictions:")
                 
-                # Sort predictions by confidence
-                sorted_preds = sorted(result['all_predictions'].items(), 
-                                    key=lambda x: x[1], reverse=True)[:3]
-                
-                for disease, conf in sorted_preds:
+                for disease, conf in result['top_predictions']:
                     print(f"  - {disease}: {conf:.3f}")
                     
             except Exception as e:
                 print(f"Error processing {img_name}: {e}")
         
+        # Bulk mode: score the whole test set in batches (packed shards when available)
+        bulk_source = SHARD_TEST_DIR if is_shard_dir(SHARD_TEST_DIR) else test_dir
+        print(f"\nBulk prediction over {bulk_source}...")
+        output_path = os.path.join(tempfile.gettempdir(), "plant_disease_test_predictions.jsonl")
+        summary = predict_plant_disease_bulk(bulk_source, output_path, batch_size=32)
+        print(f"Scored {summary['predicted']} images ({summary['failed']} failed) "
+              f"at {summary['images_per_second']:.1f} images/sec")
+        print(f"Results written to: {summary['output_path']}")
+        
         print("\n" + "=" * 50)
         print("Model test completed successfully!")
         
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for the plant disease result cache
+Checks memory hits, LRU eviction and disk TTL expiry of PredictionCache
+"""
+
+import os
+import sys
+import time
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models'))
+
+from prediction_cache import PredictionCache, make_cache_key
+
+
+def test_prediction_cache():
+    """Memory hits, LRU eviction and disk TTL expiry"""
+    print("💾 Testing prediction cache")
+    print("=" * 60)
+
+    # Keys change with the image, the model version and the result kind
+    key = make_cache_key(b"image", "keras-1")
+    assert key == make_cache_key(b"image", "keras-1")
+    assert key != make_cache_key(b"image", "keras-2")
+    assert key != make_cache_key(b"image", "keras-1", namespace="tools")
+
+    cache = PredictionCache(max_entries=2, cache_dir="")
+    assert cache.get("a") is None
+    cache.put("a", {"disease": "rust"})
+    result = cache.get("a")
+    assert result == {"disease": "rust"}
+    result["disease"] = "changed"
+    assert cache.get("a") == {"disease": "rust"}, "callers must get copies"
+
+    cache.put("b", {"disease": "blight"})
+    cache.get("a")
+    cache.put("c", {"disease": "mildew"})
+    assert cache.get("b") is None, "least recently used entry must be evicted"
+    assert cache.get("a") is not None and cache.get("c") is not None
+    print(f"   memory: {cache.stats()}")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PredictionCache(max_entries=2, cache_dir=cache_dir, ttl_hours=1)
+        cache.put("a", {"disease": "rust"})
+        cache.clear()
+        assert cache.get("a") == {"disease": "rust"}
+        assert cache.stats()["disk_hits"] == 1
+
+        # Age the disk entry past the TTL
+        cache.clear()
+        path = os.path.join(cache_dir, "a.json")
+        old = time.time() - 2 * 3600
+        os.utime(path, (old, old))
+        assert cache.get("a") is None, "expired disk entry must miss"
+        assert not os.path.exists(path), "expired disk entry must be removed"
+
+        cache.put("b", {"disease": "blight"})
+        os.utime(os.path.join(cache_dir, "b.json"), (old, old))
+        assert cache.purge_expired() == 1
+        print(f"   disk: {cache.stats()}")
+    print("✅ Prediction cache hits, evicts and expires")
+
+if __name__ == "__main__":
+    test_prediction_cache()
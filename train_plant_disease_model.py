@@ -10,11 +10,19 @@ from tensorflow.keras.preprocessing.image import ImageDataGenerator
 import numpy as np
 import matplotlib.pyplot as plt
 import os
+import sys
 import joblib
 from sklearn.metrics import classification_report
 import time
+import argparse
 
-def train_plant_disease_model():
+sys.path.append('models')
+
+from image_preprocessing import load_image_for_model
+from plant_disease_dataset import make_directory_dataset, make_shard_dataset, ThroughputCallback
+from dataset_shards import is_shard_dir
+
+def train_plant_disease_model(mode='full', augmentation_passes=2, pipeline='generator', shard_dir=None):
     print("🌱 Starting Plant Disease Detection Model Training...")
     print("=" * 60)
     
@@ -24,7 +32,12 @@ def train_plant_disease_model():
     valid_path = os.path.join(base_path, 'valid')
     
     # Check if dataset exists
-    if not os.path.exists(train_path):
+    if shard_dir:
+        if not is_shard_dir(os.path.join(shard_dir, 'train')):
+            print(f"❌ Packed training shards not found in: {shard_dir}")
+            return False
+        pipeline = 'shards'
+    elif not os.path.exists(train_path):
         print(f"❌ Training data not found at: {train_path}")
         return False
     
@@ -37,38 +50,55 @@ def train_plant_disease_model():
     print(f"   - Image Size: {IMG_SIZE}x{IMG_SIZE}")
     print(f"   - Batch Size: {BATCH_SIZE}")
     print(f"   - Epochs: {EPOCHS}")
+    print(f"   - Input pipeline: {pipeline}")
+    print(f"   - Mode: {mode}" + (f" ({augmentation_passes} augmentation passes)" if mode == 'bottleneck' else ""))
     
     # Data preprocessing
     print("\n📁 Loading and preprocessing data...")
     
-    train_datagen = ImageDataGenerator(
-        rescale=1./255,
-        rotation_range=20,
-        width_shift_range=0.2,
-        height_shift_range=0.2,
-        horizontal_flip=True,
-        zoom_range=0.2,
-        fill_mode='nearest'
-    )
+    if pipeline == 'shards':
+        # Pre-decoded uint8 shards from pack_plant_disease_dataset.py, read sequentially
+        train_generator = make_shard_dataset(os.path.join(shard_dir, 'train'), BATCH_SIZE, training=True)
+        valid_generator = make_shard_dataset(os.path.join(shard_dir, 'valid'), BATCH_SIZE, training=False)
+        train_data, valid_data = train_generator.dataset, valid_generator.dataset
+        if train_generator.image_shape[0] != IMG_SIZE:
+            print(f"❌ Shards were packed at {train_generator.image_shape[0]}px, model expects {IMG_SIZE}px")
+            return False
+    elif pipeline == 'tfdata':
+        # Parallel decode/augment with caching and prefetch (plant_disease_dataset.py)
+        train_generator = make_directory_dataset(train_path, IMG_SIZE, BATCH_SIZE, training=True)
+        valid_generator = make_directory_dataset(valid_path, IMG_SIZE, BATCH_SIZE, training=False)
+        train_data, valid_data = train_generator.dataset, valid_generator.dataset
+    else:
+        train_datagen = ImageDataGenerator(
+            rescale=1./255,
+            rotation_range=20,
+            width_shift_range=0.2,
+            height_shift_range=0.2,
+            horizontal_flip=True,
+            zoom_range=0.2,
+            fill_mode='nearest'
+        )
     
-    valid_datagen = ImageDataGenerator(rescale=1./255)
+        valid_datagen = ImageDataGenerator(rescale=1./255)
     
-    # Load data
-    train_generator = train_datagen.flow_from_directory(
-        train_path,
-        target_size=(IMG_SIZE, IMG_SIZE),
-        batch_size=BATCH_SIZE,
-        class_mode='categorical',
-        shuffle=True
-    )
+        # Load data
+        train_generator = train_datagen.flow_from_directory(
+            train_path,
+            target_size=(IMG_SIZE, IMG_SIZE),
+            batch_size=BATCH_SIZE,
+            class_mode='categorical',
+            shuffle=True
+        )
     
-    valid_generator = valid_datagen.flow_from_directory(
-        valid_path,
-        target_size=(IMG_SIZE, IMG_SIZE),
-        batch_size=BATCH_SIZE,
-        class_mode='categorical',
-        shuffle=False
-    )
+        valid_generator = valid_datagen.flow_from_directory(
+            valid_path,
+            target_size=(IMG_SIZE, IMG_SIZE),
+            batch_size=BATCH_SIZE,
+            class_mode='categorical',
+            shuffle=False
+        )
+        train_data, valid_data = train_generator, valid_generator
     
     NUM_CLASSES = train_generator.num_classes
     class_names = list(train_generator.class_indices.keys())
@@ -122,23 +152,34 @@ def train_plant_disease_model():
     ]
     
     # Train model
-    print(f"\n🚀 Starting training...")
     start_time = time.time()
     
-    history = model.fit(
-        train_generator,
-        epochs=EPOCHS,
-        validation_data=valid_generator,
-        callbacks=callbacks,
-        verbose=1
-    )
+    if mode == 'bottleneck':
+        # Frozen backbone: compute its features once, then train only the head
+        from plant_disease_bottleneck import train_head_on_bottleneck_features
+        history = train_head_on_bottleneck_features(
+            model, train_generator, valid_generator,
+            epochs=EPOCHS,
+            callbacks=callbacks,
+            augmentation_passes=augmentation_passes
+        )
+    else:
+        print(f"\n🚀 Starting training...")
+        callbacks.append(ThroughputCallback(BATCH_SIZE))
+        history = model.fit(
+            train_data,
+            epochs=EPOCHS,
+            validation_data=valid_data,
+            callbacks=callbacks,
+            verbose=1
+        )
     
     training_time = time.time() - start_time
     print(f"\n⏱️  Training completed in {training_time/60:.1f} minutes")
     
     # Evaluate model
     print(f"\n📊 Evaluating model...")
-    test_loss, test_accuracy = model.evaluate(valid_generator, verbose=0)
+    test_loss, test_accuracy = model.evaluate(valid_data, verbose=0)
     print(f"✅ Final Validation Accuracy: {test_accuracy:.4f}")
     print(f"✅ Final Validation Loss: {test_loss:.4f}")
     
@@ -156,45 +197,8 @@ def train_plant_disease_model():
     print(f"   - Classes: {class_names_path}")
     print(f"   - Model size: {os.path.getsize(model_path) / (1024*1024):.1f} MB")
     
-    # Create prediction utility
-    prediction_code = f'''import tensorflow as tf
-import numpy as np
-import joblib
-from tensorflow.keras.preprocessing import image
-
-def load_plant_disease_model():
-    """Load the trained plant disease detection model"""
-    model = tf.keras.models.load_model('models/plant_disease_model.h5')
-    class_names = joblib.load('models/plant_disease_classes.pkl')
-    return model, class_names
-
-def predict_plant_disease(image_path):
-    """Predict plant disease from image path"""
-    model, class_names = load_plant_disease_model()
-    
-    # Load and preprocess image
-    img = image.load_img(image_path, target_size=(224, 224))
-    img_array = image.img_to_array(img)
-    img_array = np.expand_dims(img_array, axis=0)
-    img_array /= 255.0
-    
-    # Make prediction
-    predictions = model.predict(img_array, verbose=0)
-    predicted_class_idx = np.argmax(predictions[0])
-    confidence = predictions[0][predicted_class_idx]
-    
-    predicted_class = class_names[predicted_class_idx]
-    
-    return {{
-        "disease": predicted_class,
-        "confidence": float(confidence),
-        "all_predictions": {{class_names[i]: float(predictions[0][i]) for i in range(len(class_names))}}
-    }}
-'''
-    
-    with open('models/plant_disease_predictor.py', 'w') as f:
-        f.write(prediction_code)
-    
+    # models/plant_disease_predictor.py picks up the new files through
+    # models/model_registry.py the next time a process loads them
     print(f"   - Predictor: models/plant_disease_predictor.py")
     
     # Test with sample images
@@ -207,11 +211,8 @@ def predict_plant_disease(image_path):
         for img_name in test_images:
             img_path = os.path.join(test_images_path, img_name)
             
-            # Load and preprocess image
-            img = tf.keras.preprocessing.image.load_img(img_path, target_size=(IMG_SIZE, IMG_SIZE))
-            img_array = tf.keras.preprocessing.image.img_to_array(img)
-            img_array = np.expand_dims(img_array, axis=0)
-            img_array /= 255.0
+            # Load and preprocess image (same decode path as the predictor)
+            img_array = load_image_for_model(img_path, size=IMG_SIZE)[np.newaxis]
             
             # Predict
             predictions = model.predict(img_array, verbose=0)
@@ -227,8 +228,21 @@ def predict_plant_disease(image_path):
     return True
 
 if __name__ == "__main__":
-    success = train_plant_disease_model()
+    parser = argparse.ArgumentParser(description="Train the plant disease detection model")
+    parser.add_argument("--mode", choices=["full", "bottleneck"], default="full",
+                        help="full: run the backbone every epoch; bottleneck: cache backbone features once and train the head on them")
+    parser.add_argument("--augmentation-passes", type=int, default=2,
+                        help="augmented copies of the training set to cache in bottleneck mode")
+    parser.add_argument("--pipeline", choices=["generator", "tfdata"], default="generator",
+                        help="input pipeline: Keras ImageDataGenerator or the parallel tf.data pipeline")
+    parser.add_argument("--shards", default=None,
+                        help="read packed shards from this directory (see pack_plant_disease_dataset.py) instead of image folders")
+    args = parser.parse_args()
+    
+    success = train_plant_disease_model(mode=args.mode, augmentation_passes=args.augmentation_passes,
+                                        pipeline=args.pipeline, shard_dir=args.shards)
     if success:
         print("✅ You can now test the model with: python test_plant_disease_model.py")
+        print("   Export quantized TFLite models with: python export_tflite_model.py")
     else:
         print("❌ Training failed. Please check the dataset path and try again.")